@@ -4,7 +4,7 @@ Streamlit dashboard for Personal Finance Trend Analyzer.
 Now with:
 - Budgets & alerts (total + per-category caps)
 - 'This month vs 3-month average' comparison card
-- Cross-platform upload handling (tempfile)
+- Cross-platform upload handling (in-memory, no temp files)
 - .env auto-loading for SMTP/Telegram secrets
 - ✅ 3 distinct donut charts (Category, Payment/Top Merchants, Income vs Expense)
 - ✅ Notify section ALWAYS visible + TEST email button (no columns)
@@ -13,25 +13,48 @@ Now with:
 """
 from __future__ import annotations
 
-# >>> .env loader must be first so env vars are available everywhere
-from dotenv import load_dotenv
-load_dotenv()
-
+import dataclasses
+import io
 import os
 import sys
-import tempfile
-from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import plotly.graph_objs as go
+import pyarrow as pa
 import streamlit as st
+from plotly.subplots import make_subplots
+
+
+# >>> .env loader runs before anything reads SMTP/Telegram settings.
+# cache_resource keeps it to once per process instead of once per rerun.
+@st.cache_resource
+def _load_env() -> bool:
+    from dotenv import load_dotenv
+    load_dotenv()
+    return True
+
+
+_load_env()
 
 from pipeline.ingestion import load_transactions
 from pipeline.cleaning import clean_transactions
 from pipeline.categorize import categorize, load_rules
 from pipeline.forecasting import forecast_monthly_spend
-from pipeline.visualize import category_spend_bar, monthly_trend_line, forecast_line
-from pipeline.budget import BudgetConfig, monthly_total_spend, build_alerts
-from pipeline.visualize import budget_donut, category_utilization_df
+from pipeline.visualize import (
+    category_spend_bar,
+    monthly_trend_line,
+    forecast_line,
+    budget_donut,
+    category_utilization_df,
+)
+from pipeline.budget import (
+    ALERT_STATUSES,
+    CONFIG_PATH as BUDGETS_PATH,
+    BudgetConfig,
+    monthly_total_spend,
+    build_alerts,
+)
 from pipeline.notify import send_alerts as _send_alerts
 
 # ✅ scheduled notification settings support
@@ -41,20 +64,162 @@ from pipeline.schedule import NotifySettings
 # ----------------------------- Build marker -----------------------------
 APP_BUILD_ID = "PFTA_BUILD_2026-01-07_ALWAYS_VISIBLE_NOTIFY_SETTINGS_DEBUG_V2"
 
+NOTIFY_SETTINGS_PATH = "config/notify_settings.yml"
 
-# ----------------------------- Helper functions (3 donuts) -----------------------------
-def _pick_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
-    for c in candidates:
-        if c in df.columns:
-            return c
-    return None
+
+# ----------------------------- Cached config loads -----------------------------
+# The mtime argument is only a cache key: editing/saving the YAML invalidates the entry.
+def _mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
+
+
+@st.cache_resource
+def _load_budget(mtime: float) -> BudgetConfig:
+    return BudgetConfig.load(BUDGETS_PATH)
+
+
+@st.cache_resource
+def _load_notify_settings(mtime: float) -> NotifySettings:
+    return NotifySettings.load(NOTIFY_SETTINGS_PATH)
+
+
+# ----------------------------- Cached pipeline stages -----------------------------
+# Streamlit reruns the whole script on every widget interaction; these wrappers
+# keep ingestion/cleaning/categorization/forecasting off that hot path.
+def _df_hash(d: pd.DataFrame) -> bytes:
+    return pd.util.hash_pandas_object(d, index=True).values.tobytes()
+
+
+def _cfg_hash(cfg: BudgetConfig) -> str:
+    return repr(cfg.__dict__)
+
+
+@st.cache_data(show_spinner=False)
+def _ingest_file(path: str, mtime: float) -> pd.DataFrame:
+    # mtime is part of the cache key so edits to the file invalidate the entry
+    return load_transactions(path)
+
+
+@st.cache_data(show_spinner=False)
+def _ingest_upload(data: bytes, name: str) -> pd.DataFrame:
+    # Keyed on the uploaded bytes, so re-uploading the same file hits the cache
+    return load_transactions(io.BytesIO(data), name=name)
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _df_hash})
+def _clean_categorize(raw_df: pd.DataFrame) -> pd.DataFrame:
+    df = categorize(clean_transactions(raw_df))
+    # Narrower dtypes cut the bytes every mask/groupby below has to scan.
+    # Amounts stay float64: float32 loses rupee precision on multi-lakh totals.
+    df["date"] = df["date"].astype("datetime64[s]")
+    # (category is already categorical straight out of categorize)
+    for col in ("type", "mode"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _df_hash})
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    # Arrow-backed copy for session state and numeric kernels; serializes without pickle overhead
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _df_hash})
+def _monthly(df: pd.DataFrame) -> pd.Series:
+    # Single monthly aggregate shared by the variance cards, trend chart and forecast
+    return monthly_total_spend(df)
+
+
+@st.cache_data(show_spinner=False)
+def _forecast(monthly: pd.Series, periods: int) -> tuple[pd.Series, pd.Series]:
+    return forecast_monthly_spend(periods=periods, monthly=monthly)
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _df_hash})
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _df_hash, BudgetConfig: _cfg_hash})
+def _alerts(df: pd.DataFrame, cfg: BudgetConfig) -> pd.DataFrame:
+    return build_alerts(df, cfg)
+
+
+# Figures are cached too, so a rerun only rebuilds the charts whose inputs changed
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _df_hash})
+def _category_bar_fig(df: pd.DataFrame):
+    return category_spend_bar(df)
+
+
+@st.cache_data(show_spinner=False)
+def _trend_fig(monthly: pd.Series):
+    return monthly_trend_line(monthly=monthly)
+
+
+@st.cache_data(show_spinner=False)
+def _forecast_fig(hist: pd.Series, fc: pd.Series):
+    return forecast_line(hist, fc)
 
 
-def _donut_plotly(labels, values, title: str):
-    import plotly.express as px
-    fig = px.pie(names=labels, values=values, hole=0.65)
+@st.cache_data(show_spinner=False)
+def _budget_fig(total_cap: float, spend: float):
+    return budget_donut(total_cap, spend)
+
+
+# ----------------------------- Table formatting -----------------------------
+def _fmt_amounts(s: pd.Series) -> pd.Series:
+    # Format non-missing values only; missing cells render as an em dash
+    vals = pd.to_numeric(s, errors="coerce")
+    mask = vals.notna().to_numpy()
+    out = np.full(len(vals), "—", dtype=object)
+    out[mask] = ["{:,.0f}".format(v) for v in vals.to_numpy()[mask]]
+    return pd.Series(out, index=s.index)
+
+
+def _fmt_pcts(s: pd.Series) -> pd.Series:
+    vals = pd.to_numeric(s, errors="coerce")
+    pct = (vals * 100).round(0).astype("Int64").astype(str) + "%"
+    return pct.where(vals.notna(), "—")
+
+
+_STATUS_CSS = {
+    "OVER": "background-color: rgba(255,0,0,0.12);",
+    "NEAR": "background-color: rgba(255,165,0,0.12);",
+}
+
+
+def _color_table(df: pd.DataFrame) -> pd.DataFrame:
+    # Styler.apply(axis=None) hook: one precomputed 2-D CSS array instead of a per-row callback
+    status = df["status"].astype(pd.CategoricalDtype(ALERT_STATUSES, ordered=True))
+    # Palette aligned with the category codes; the trailing "" catches code -1 (missing)
+    palette = np.array([_STATUS_CSS.get(c, "") for c in ALERT_STATUSES] + [""], dtype=object)
+    row_css = palette[status.cat.codes.to_numpy()]
+    out = np.repeat(row_css[:, None], df.shape[1], axis=1)
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
+
+
+# ----------------------------- Helper functions (3 donuts) -----------------------------
+def _pick_col(col_index: dict[str, str], candidates: list[str]) -> str | None:
+    # col_index maps lowercased column names to the real ones (built once per render)
+    return next((col_index[c.lower()] for c in candidates if c.lower() in col_index), None)
+
+
+@st.cache_data(show_spinner=False)
+def _donuts_plotly(donuts: tuple):
+    """
+    All donuts side by side in one subplot figure (a single Plotly mount in the browser).
+    `donuts` is a tuple of (title, labels, values) tuples so the call stays hashable.
+    """
+    fig = make_subplots(
+        rows=1,
+        cols=len(donuts),
+        specs=[[{"type": "domain"}] * len(donuts)],
+        subplot_titles=[title for title, _, _ in donuts],
+    )
+    for i, (title, labels, values) in enumerate(donuts, start=1):
+        fig.add_trace(go.Pie(labels=list(labels), values=list(values), hole=0.65, name=title), 1, i)
     fig.update_layout(
-        title=title,
         margin=dict(l=10, r=10, t=45, b=10),
         legend=dict(orientation="h", y=-0.2),
     )
@@ -66,11 +231,16 @@ def _top_n_with_other(series: pd.Series, n: int = 7) -> pd.Series:
     if series.empty:
         return series
     series = series.sort_values(ascending=False)
-    top = series.head(n)
-    rest_sum = float(series.iloc[n:].sum()) if len(series) > n else 0.0
+    vals = series.to_numpy()
+    idx = series.index.to_numpy()
+    rest_sum = float(vals[n:].sum())
     if rest_sum > 0:
-        top.loc["Other"] = rest_sum
-    return top
+        # Build the final Series in one allocation instead of enlarging via .loc
+        return pd.Series(
+            np.concatenate([vals[:n], [rest_sum]]),
+            index=np.concatenate([idx[:n], np.array(["Other"], dtype=object)]),
+        )
+    return series.head(n)
 
 
 def render_three_donuts(df: pd.DataFrame):
@@ -78,37 +248,45 @@ def render_three_donuts(df: pd.DataFrame):
         st.warning("3-donut charts skipped: column 'signed_amount' not found.")
         return
 
-    expense_df = df[df["signed_amount"] < 0].copy()
-    income_df = df[df["signed_amount"] > 0].copy()
+    # One sign mask shared by every branch below
+    neg = df["signed_amount"].to_numpy() < 0
+    if not neg.any():
+        st.subheader("🍩 Quick Snapshot (3 perspectives)")
+        st.info("No expense data yet.")
+        return
+
+    expense_df = df[neg]
+    income_df = df[~neg]
+    col_index = {c.lower(): c for c in df.columns}
 
     # 1) Expense by Category
-    category_col = _pick_col(df, ["category", "Category", "txn_category", "merchant_category"])
-    if category_col and not expense_df.empty:
-        cat_spend = expense_df.groupby(category_col)["signed_amount"].sum().abs()
+    category_col = _pick_col(col_index, ["category", "txn_category", "merchant_category"])
+    if category_col:
+        cat_spend = expense_df.groupby(category_col, observed=True)["signed_amount"].sum().abs()
         cat_spend = _top_n_with_other(cat_spend, n=7)
         labels1, values1 = cat_spend.index.astype(str).tolist(), cat_spend.values.tolist()
     else:
         labels1, values1 = (
             ["No category data"],
-            [float(expense_df["signed_amount"].abs().sum()) if not expense_df.empty else 1.0],
+            [float(expense_df["signed_amount"].abs().sum())],
         )
 
     # 2) Expense by Payment Method (fallback to Top Merchants/Descriptions)
     method_col = _pick_col(
-        df,
-        ["payment_method", "Payment Method", "method", "mode", "Mode", "payment_mode", "channel", "instrument"],
+        col_index,
+        ["payment_method", "payment method", "method", "mode", "payment_mode", "channel", "instrument"],
     )
     merchant_fallback_col = _pick_col(
-        df,
-        ["merchant", "Merchant", "payee", "Payee", "description", "Description", "narration", "Narration", "remarks", "Remarks"],
+        col_index,
+        ["merchant", "payee", "description", "narration", "remarks"],
     )
 
-    if method_col and not expense_df.empty:
-        pm_spend = expense_df.groupby(method_col)["signed_amount"].sum().abs()
+    if method_col:
+        pm_spend = expense_df.groupby(method_col, observed=True)["signed_amount"].sum().abs()
         pm_spend = _top_n_with_other(pm_spend, n=7)
         labels2, values2 = pm_spend.index.astype(str).tolist(), pm_spend.values.tolist()
         donut2_title = "Spend by Payment Method"
-    elif merchant_fallback_col and not expense_df.empty:
+    elif merchant_fallback_col:
         top_merchants = expense_df.groupby(merchant_fallback_col)["signed_amount"].sum().abs()
         top_merchants = _top_n_with_other(top_merchants, n=7)
         labels2, values2 = top_merchants.index.astype(str).tolist(), top_merchants.values.tolist()
@@ -116,26 +294,25 @@ def render_three_donuts(df: pd.DataFrame):
     else:
         labels2, values2 = (
             ["No method/merchant data"],
-            [float(expense_df["signed_amount"].abs().sum()) if not expense_df.empty else 1.0],
+            [float(expense_df["signed_amount"].abs().sum())],
         )
         donut2_title = "Spend Split"
 
     # 3) Income vs Expense
-    income_total = float(income_df["signed_amount"].sum()) if not income_df.empty else 0.0
-    expense_total = float(expense_df["signed_amount"].abs().sum()) if not expense_df.empty else 0.0
+    income_total = float(income_df["signed_amount"].sum())
+    expense_total = float(expense_df["signed_amount"].abs().sum())
     labels3 = ["Income", "Expense"]
     values3 = [income_total if income_total > 0 else 0.0, expense_total if expense_total > 0 else 0.0]
     if sum(values3) == 0:
         values3 = [1.0, 1.0]
 
     st.subheader("🍩 Quick Snapshot (3 perspectives)")
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        st.plotly_chart(_donut_plotly(labels1, values1, "Spend by Category"), use_container_width=True)
-    with c2:
-        st.plotly_chart(_donut_plotly(labels2, values2, donut2_title), use_container_width=True)
-    with c3:
-        st.plotly_chart(_donut_plotly(labels3, values3, "Income vs Expense"), use_container_width=True)
+    donuts = (
+        ("Spend by Category", tuple(labels1), tuple(values1)),
+        (donut2_title, tuple(labels2), tuple(values2)),
+        ("Income vs Expense", tuple(labels3), tuple(values3)),
+    )
+    st.plotly_chart(_donuts_plotly(donuts), use_container_width=True, key="donuts")
 
 
 # ---------- Page config ----------
@@ -172,20 +349,25 @@ st.subheader("🔔 Notifications")
 st.markdown("**Manual Notify** (reads SMTP/Telegram from environment or `.env`)")
 st.caption("Use TEST to verify SMTP/Telegram even if you have zero alerts configured.")
 
-# TEST is always available because it uses a dummy alert row
-if st.button("Send TEST email (even if no alerts)", key="send_test_top"):
-    test_df = pd.DataFrame([{
-        "scope": "TOTAL",
-        "category": "—",
-        "month": pd.Timestamp.today().strftime("%Y-%m"),
-        "spend": 12345.0,
-        "cap": 15000.0,
-        "remaining": 2655.0,
-        "pct": 0.82,
-        "status": "NEAR",
-    }])
-    res = _send_alerts(test_df, subject_prefix="Personal Finance (TEST)")
-    st.write({"email": res.get("email"), "telegram": res.get("telegram")})
+@st.fragment
+def _manual_notify_fragment():
+    # TEST is always available because it uses a dummy alert row
+    if st.button("Send TEST email (even if no alerts)", key="send_test_top"):
+        test_df = pd.DataFrame([{
+            "scope": "TOTAL",
+            "category": "—",
+            "month": pd.Timestamp.today().strftime("%Y-%m"),
+            "spend": 12345.0,
+            "cap": 15000.0,
+            "remaining": 2655.0,
+            "pct": 0.82,
+            "status": "NEAR",
+        }])
+        res = _send_alerts(test_df, subject_prefix="Personal Finance (TEST)")
+        st.write({"email": res.get("email"), "telegram": res.get("telegram")})
+
+
+_manual_notify_fragment()
 
 st.divider()
 
@@ -195,71 +377,78 @@ st.caption(
     "They do NOT affect the manual TEST button above."
 )
 
-try:
-    ns = NotifySettings.load()
-except Exception as e:
-    st.error(f"Failed to load notification settings: {e}")
-    ns = NotifySettings(
-        enabled=False,
-        email=True,
-        telegram=False,
-        frequency="weekly",
-        timezone="Asia/Kolkata",
-        monthly_day=1,
-        weekly_weekday=0,
+@st.fragment
+def _notify_settings_fragment():
+    # Independent of the dataset, so its widgets never trigger a full-page rerun
+    try:
+        # Copy: the cached instance is shared, and the Save handler below mutates ns
+        ns = dataclasses.replace(_load_notify_settings(_mtime(NOTIFY_SETTINGS_PATH)))
+    except Exception as e:
+        st.error(f"Failed to load notification settings: {e}")
+        ns = NotifySettings(
+            enabled=False,
+            email=True,
+            telegram=False,
+            frequency="weekly",
+            timezone="Asia/Kolkata",
+            monthly_day=1,
+            weekly_weekday=0,
+        )
+
+    colA, colB, colC = st.columns(3)
+    with colA:
+        enabled = st.toggle("Enable scheduled notifications", value=bool(ns.enabled))
+    with colB:
+        email_on = st.toggle("Email channel", value=bool(ns.email))
+    with colC:
+        telegram_on = st.toggle("Telegram channel", value=bool(ns.telegram))
+
+    freq = st.selectbox(
+        "Frequency",
+        options=["weekly", "biweekly", "monthly"],
+        index=["weekly", "biweekly", "monthly"].index(
+            ns.frequency if ns.frequency in ["weekly", "biweekly", "monthly"] else "weekly"
+        ),
     )
 
-colA, colB, colC = st.columns(3)
-with colA:
-    enabled = st.toggle("Enable scheduled notifications", value=bool(ns.enabled))
-with colB:
-    email_on = st.toggle("Email channel", value=bool(ns.email))
-with colC:
-    telegram_on = st.toggle("Telegram channel", value=bool(ns.telegram))
-
-freq = st.selectbox(
-    "Frequency",
-    options=["weekly", "biweekly", "monthly"],
-    index=["weekly", "biweekly", "monthly"].index(
-        ns.frequency if ns.frequency in ["weekly", "biweekly", "monthly"] else "weekly"
-    ),
-)
+    weekly_weekday = ns.weekly_weekday
+    monthly_day = ns.monthly_day
+
+    if freq in ["weekly", "biweekly"]:
+        weekday_choice = st.selectbox(
+            "Send on weekday",
+            options=[
+                ("Monday", 0), ("Tuesday", 1), ("Wednesday", 2),
+                ("Thursday", 3), ("Friday", 4), ("Saturday", 5), ("Sunday", 6),
+            ],
+            index=[0, 1, 2, 3, 4, 5, 6].index(int(ns.weekly_weekday)),
+            format_func=lambda x: x[0],
+        )
+        weekly_weekday = int(weekday_choice[1])
+    else:
+        monthly_day = int(
+            st.number_input("Send on day of month (1–28)", min_value=1, max_value=28, value=int(ns.monthly_day))
+        )
 
-weekly_weekday = ns.weekly_weekday
-monthly_day = ns.monthly_day
-
-if freq in ["weekly", "biweekly"]:
-    weekday_choice = st.selectbox(
-        "Send on weekday",
-        options=[
-            ("Monday", 0), ("Tuesday", 1), ("Wednesday", 2),
-            ("Thursday", 3), ("Friday", 4), ("Saturday", 5), ("Sunday", 6),
-        ],
-        index=[0, 1, 2, 3, 4, 5, 6].index(int(ns.weekly_weekday)),
-        format_func=lambda x: x[0],
-    )
-    weekly_weekday = int(weekday_choice[1])
-else:
-    monthly_day = int(
-        st.number_input("Send on day of month (1–28)", min_value=1, max_value=28, value=int(ns.monthly_day))
-    )
+    tz = st.text_input("Timezone", value=str(ns.timezone))
 
-tz = st.text_input("Timezone", value=str(ns.timezone))
+    if st.button("Save notification settings", key="save_notify_settings"):
+        ns.enabled = bool(enabled)
+        ns.email = bool(email_on)
+        ns.telegram = bool(telegram_on)
+        ns.frequency = str(freq)
+        ns.weekly_weekday = int(weekly_weekday)
+        ns.monthly_day = int(monthly_day)
+        ns.timezone = str(tz)
 
-if st.button("Save notification settings", key="save_notify_settings"):
-    ns.enabled = bool(enabled)
-    ns.email = bool(email_on)
-    ns.telegram = bool(telegram_on)
-    ns.frequency = str(freq)
-    ns.weekly_weekday = int(weekly_weekday)
-    ns.monthly_day = int(monthly_day)
-    ns.timezone = str(tz)
+        try:
+            ns.save(NOTIFY_SETTINGS_PATH)
+            st.success("✅ Saved to `config/notify_settings.yml`.")
+        except Exception as e:
+            st.error(f"Could not save settings: {e}")
 
-    try:
-        ns.save()
-        st.success("✅ Saved to `config/notify_settings.yml`.")
-    except Exception as e:
-        st.error(f"Could not save settings: {e}")
+
+_notify_settings_fragment()
 
 st.divider()
 
@@ -293,18 +482,19 @@ if not uploaded and not use_sample:
 try:
     if use_sample:
         input_path = "data/sample_transactions.csv"
-        raw_df = load_transactions(input_path)
+        raw_df = _ingest_file(input_path, os.path.getmtime(input_path))
     else:
-        tmp_path = Path(tempfile.gettempdir()) / uploaded.name
-        tmp_path.write_bytes(uploaded.getvalue())
-        raw_df = load_transactions(str(tmp_path))
+        raw_df = _ingest_upload(uploaded.getvalue(), uploaded.name)
 except Exception as e:
     st.error(f"Could not read the file. Details: {e}")
     st.stop()
 
 # ---------- Clean & categorize ----------
-df = clean_transactions(raw_df)
-df = categorize(df)
+df = _clean_categorize(raw_df)
+m_series = _monthly(df)
+tbl = _to_arrow(df)
+st.session_state["tbl"] = tbl
+st.session_state["monthly"] = m_series
 
 # ---------- Optional raw preview ----------
 if show_raw:
@@ -317,9 +507,10 @@ if show_rules:
         st.write(load_rules())
 
 # ---------- KPIs ----------
-total_spend = (-df.loc[df["signed_amount"] < 0, "signed_amount"].sum())
-total_income = df.loc[df["signed_amount"] > 0, "signed_amount"].sum()
-months = df["date"].dt.to_period("M").nunique()
+amt = tbl.column("signed_amount").to_numpy()
+total_spend = -np.minimum(amt, 0.0).sum()
+total_income = np.maximum(amt, 0.0).sum()
+months = np.unique(tbl.column("date").to_numpy().astype("datetime64[M]")).size
 
 c1, c2, c3 = st.columns(3)
 c1.metric("Total Spend (₹)", f"{total_spend:,.0f}")
@@ -329,10 +520,12 @@ c3.metric("Months Covered", int(months))
 render_three_donuts(df)
 
 # ---------- Variance ----------
-m_series = monthly_total_spend(df)
 if len(m_series) >= 1:
     this_month_spend = float(m_series.iloc[-1])
-    trailing_avg = float(m_series.iloc[:-1].tail(3).mean()) if len(m_series) > 1 else 0.0
+    # Trailing 3-month mean excluding the current month; the full series is kept for reuse
+    rolling_prev = m_series.rolling(3, min_periods=1).mean().shift(1)
+    st.session_state["rolling_prev"] = rolling_prev
+    trailing_avg = float(rolling_prev.iloc[-1]) if len(m_series) > 1 else 0.0
     delta = this_month_spend - trailing_avg
     delta_pct = (delta / trailing_avg * 100.0) if trailing_avg > 0 else 0.0
 
@@ -346,25 +539,32 @@ else:
 left, right = st.columns(2)
 with left:
     st.subheader("Category breakdown")
-    st.plotly_chart(category_spend_bar(df), use_container_width=True)
+    st.plotly_chart(_category_bar_fig(df), use_container_width=True, key="category_bar")
 with right:
     st.subheader("Monthly spend trend")
-    st.plotly_chart(monthly_trend_line(df), use_container_width=True)
+    st.plotly_chart(_trend_fig(m_series), use_container_width=True, key="monthly_trend")
 
 # ---------- Forecast ----------
 st.subheader("🔮 Spend forecast")
-periods = st.slider("Forecast months", min_value=3, max_value=12, value=6)
-hist, fc = forecast_monthly_spend(df, periods=periods)
-st.plotly_chart(forecast_line(hist, fc), use_container_width=True)
-st.dataframe(
-    pd.DataFrame({"Month": fc.index.strftime("%Y-%m"), "Forecast Spend (₹)": fc.values}),
-    use_container_width=True,
-)
+@st.fragment
+def _forecast_fragment():
+    # Reruns on its own when the slider moves; the rest of the page stays put
+    m_series = st.session_state["monthly"]
+    periods = st.slider("Forecast months", min_value=3, max_value=12, value=6)
+    hist, fc = _forecast(m_series, periods)
+    st.plotly_chart(_forecast_fig(hist, fc), use_container_width=True, key="forecast_line")
+    st.dataframe(
+        pd.DataFrame({"Month": fc.index.strftime("%Y-%m"), "Forecast Spend (₹)": fc.values}),
+        use_container_width=True,
+    )
+
+
+_forecast_fragment()
 
 # ---------- Budgets & Alerts ----------
 st.subheader("🚨 Budgets & Alerts")
-cfg = BudgetConfig.load()
-alerts_df = build_alerts(df, cfg)
+cfg = _load_budget(_mtime(BUDGETS_PATH))
+alerts_df = _alerts(df, cfg)
 
 st.markdown("**Notify (data-based)**")
 st.caption("This button uses real alerts from your current dataset.")
@@ -382,34 +582,33 @@ else:
     if not total_row.empty and pd.notna(total_row.iloc[0]["cap"]):
         tcap = float(total_row.iloc[0]["cap"])
         tspend = float(total_row.iloc[0]["spend"])
-        st.plotly_chart(budget_donut(tcap, tspend), use_container_width=True)
+        st.plotly_chart(_budget_fig(tcap, tspend), use_container_width=True, key="budget_donut")
 
     st.markdown("**Category caps progress**")
     cat_df = category_utilization_df(alerts_df)
     if cat_df.empty:
         st.caption("No per-category caps set.")
     else:
-        for _, r in cat_df.iterrows():
-            label = f"{r['category']} — ₹{r['spend']:,.0f} / ₹{r['cap']:,.0f} ({r['pct']:.0%}) [{r['status']}]"
-            st.write(label)
-            st.progress(min(max(float(r["pct"]), 0.0), 1.0))
-
-    def _row_style(row):
-        if row["status"] == "OVER":
-            return "background-color: rgba(255,0,0,0.12);"
-        if row["status"] == "NEAR":
-            return "background-color: rgba(255,165,0,0.12);"
-        return ""
+        rows = zip(
+            cat_df["category"].to_numpy(),
+            cat_df["spend"].to_numpy(),
+            cat_df["cap"].to_numpy(),
+            cat_df["pct"].to_numpy(),
+            cat_df["status"].to_numpy(),
+        )
+        for cat, spend, cap, pct, status in rows:
+            st.write(f"{cat} — ₹{spend:,.0f} / ₹{cap:,.0f} ({pct:.0%}) [{status}]")
+            st.progress(min(max(float(pct), 0.0), 1.0))
 
     show = alerts_df.copy()
-    show["cap"] = show["cap"].map(lambda x: f"{x:,.0f}" if pd.notna(x) else "—")
-    show["spend"] = show["spend"].map(lambda x: f"{x:,.0f}")
-    show["remaining"] = show["remaining"].map(lambda x: f"{x:,.0f}" if pd.notna(x) else "—")
-    show["pct"] = show["pct"].map(lambda x: f"{x:.0%}" if pd.notna(x) else "—")
+    show["cap"] = _fmt_amounts(show["cap"])
+    show["spend"] = _fmt_amounts(show["spend"])
+    show["remaining"] = _fmt_amounts(show["remaining"])
+    show["pct"] = _fmt_pcts(show["pct"])
 
     st.dataframe(
         show[["scope", "category", "month", "spend", "cap", "remaining", "pct", "status"]]
-        .style.apply(lambda s: [_row_style(s)] * len(s), axis=1),
+        .style.apply(_color_table, axis=None),
         use_container_width=True
     )
 
@@ -417,7 +616,7 @@ else:
 st.subheader("📥 Export processed data")
 st.download_button(
     "Download processed CSV",
-    data=df.to_csv(index=False).encode("utf-8"),
+    data=_to_csv_bytes(df),
     file_name="processed_transactions.csv",
     mime="text/csv"
 )
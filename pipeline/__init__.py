@@ -11,6 +11,7 @@ Example:
 from .ingestion import load_transactions
 from .cleaning import clean_transactions
 from .categorize import categorize, load_rules
+from .cache import load_many, load_or_build
 from .forecasting import forecast_monthly_spend
 from .visualize import (
     category_spend_bar,
@@ -32,6 +33,8 @@ __all__ = [
     # ingestion / cleaning
     "load_transactions",
     "clean_transactions",
+    "load_or_build",
+    "load_many",
 
     # categorization
     "categorize",
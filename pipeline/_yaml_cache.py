@@ -0,0 +1,26 @@
+"""
+Process-wide cache for parsed YAML config files.
+
+Entries are keyed by path and invalidated when the file's (st_mtime_ns, st_size)
+changes, so a hit skips both the read and yaml.safe_load.
+
+The returned object is shared between callers: treat it as read-only.
+"""
+from __future__ import annotations
+import os
+from typing import Any, Dict, Tuple
+
+import yaml
+
+_YAML_CACHE: Dict[str, Tuple[int, int, Any]] = {}
+
+
+def load_yaml_cached(path: str) -> Any:
+    st = os.stat(path)
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    _YAML_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    return data
@@ -7,14 +7,26 @@ Budget & alerts utilities:
 """
 from __future__ import annotations
 import os
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import yaml
+
+from ._yaml_cache import load_yaml_cached
+from .utils import content_key, lru_get, month_key, monthly_spend
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "budgets.yml")
 
+# Monthly spend keyed by (content hash of (date, signed_amount), months); see monthly_total_spend
+_MONTHLY_CACHE: "OrderedDict[Tuple[bytes, Optional[int]], pd.Series]" = OrderedDict()
+
+# Alert statuses in increasing severity; build_alerts returns `status` with this categorical dtype
+ALERT_STATUSES = ["N/A", "OK", "NEAR", "OVER"]
+# Alert scopes in sort order; build_alerts returns `scope` with this categorical dtype
+ALERT_SCOPES = ["CATEGORY", "TOTAL"]
+
 
 @dataclass
 class BudgetConfig:
@@ -27,8 +39,7 @@ class BudgetConfig:
         if not os.path.exists(path):
             # Sensible defaults if file not present
             return cls(monthly_total_cap=None, warn_threshold=0.9, category_caps={})
-        with open(path, "r", encoding="utf-8") as f:
-            y = yaml.safe_load(f) or {}
+        y = load_yaml_cached(path) or {}
         return cls(
             monthly_total_cap=y.get("monthly_total_cap", None),
             warn_threshold=float(y.get("warn_threshold", 0.9)),
@@ -36,34 +47,58 @@ class BudgetConfig:
         )
 
 
-def _this_month_period(df: pd.DataFrame) -> pd.Period:
+def _this_month_key(keys: np.ndarray) -> np.datetime64:
     # Use the latest date in the dataset as "current month" for reproducible historical analyses
-    latest = pd.to_datetime(df["date"]).max()
-    return latest.to_period("M")
+    return keys[~np.isnat(keys)].max()
 
 
 def current_month_frames(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Period]:
-    p = _this_month_period(df)
-    cur = df[df["date"].dt.to_period("M") == p]
-    return cur, p
-
-
-def monthly_total_spend(df: pd.DataFrame) -> pd.Series:
+    # Filter on the datetime64[M] bucket (int64 compare); only the label is built as a Period
+    keys = month_key(pd.to_datetime(df["date"]))
+    latest = _this_month_key(keys)
+    cur = df[keys == latest]
+    return cur, pd.Period(latest, freq="M")
+
+
+def _monthly_window(dates: pd.Series, signed: pd.Series, months: Optional[int]) -> pd.Series:
+    if months is None:
+        return monthly_spend(dates, signed)
+    keys = month_key(dates)
+    valid = keys[~np.isnat(keys)]
+    if valid.size == 0:
+        return monthly_spend(dates, signed)
+    # Only rows in the last `months` calendar months are grouped; the window is
+    # reindexed so leading empty months still show as 0, as in the full series
+    latest = valid.max()
+    lo = max(valid.min(), latest - np.timedelta64(months - 1, "M"))
+    m = keys >= lo
+    s = monthly_spend(dates[m], signed[m])
+    idx = pd.date_range(lo, latest, freq="MS", name=dates.name).as_unit(dates.dt.unit)
+    return s.reindex(idx, fill_value=0.0)
+
+
+def monthly_total_spend(df: pd.DataFrame, months: Optional[int] = None) -> pd.Series:
     # Positive spend per month (sum of negative signed_amounts turned positive)
-    m = df.set_index("date")["signed_amount"].resample("MS").sum()
-    return (-m).clip(lower=0)
+    # months: only the trailing `months` months up to the latest date (== full result .tail(months))
+    # Cached on the input's content, so reruns over unchanged data skip the groupby
+    key = (content_key(df["date"], df["signed_amount"]), months)
+    return lru_get(_MONTHLY_CACHE, key, lambda: _monthly_window(df["date"], df["signed_amount"], months)).copy()
 
 
 def monthly_category_spend(df: pd.DataFrame) -> pd.DataFrame:
     # Positive spend per month & category
-    g = (df[df["signed_amount"] < 0]
-         .copy())
-    g["month"] = g["date"].dt.to_period("M")
-    out = (g.groupby(["month", "category"])["signed_amount"]
+    # Group on (integer month key, category codes); Periods are built once per group, not per row
+    g = df[df["signed_amount"] < 0]
+    codes, cats = pd.factorize(g["category"], sort=True)
+    out = (pd.Series(g["signed_amount"].to_numpy())
+           .groupby([month_key(g["date"]), codes])
            .sum()
            .mul(-1)
            .rename("spend")
            .reset_index())
+    out.columns = ["month", "category", "spend"]
+    out["month"] = pd.PeriodIndex(out["month"], freq="M")
+    out["category"] = cats.take(out["category"].to_numpy())
     return out
 
 
@@ -85,51 +120,38 @@ def build_alerts(df: pd.DataFrame, cfg: BudgetConfig) -> pd.DataFrame:
     month_label = str(mp)
 
     total_spend = (-cur.loc[cur["signed_amount"] < 0, "signed_amount"].sum())
-    alerts = []
-
-    def classify(spend: float, cap: Optional[float]):
-        if cap is None:
-            return ("N/A", None, None)  # status, pct, remaining
-        pct = spend / cap if cap > 0 else 0.0
-        remaining = cap - spend
-        if spend > cap:
-            return ("OVER", pct, remaining)
-        elif pct >= cfg.warn_threshold:
-            return ("NEAR", pct, remaining)
-        else:
-            return ("OK", pct, remaining)
-
-    # TOTAL
-    status, pct, remaining = classify(total_spend, cfg.monthly_total_cap)
-    alerts.append({
-        "scope": "TOTAL",
-        "category": "TOTAL",
-        "month": month_label,
-        "spend": float(total_spend),
-        "cap": float(cfg.monthly_total_cap) if cfg.monthly_total_cap is not None else None,
-        "remaining": remaining,
-        "pct": pct,
-        "status": status,
-    })
 
     # Per-category
     cat_spend = (cur[cur["signed_amount"] < 0]
-                 .groupby("category")["signed_amount"].sum()
-                 .mul(-1)
-                 .sort_values(ascending=False))
-
-    for cat, cap in cfg.category_caps.items():
-        spend = float(cat_spend.get(cat, 0.0))
-        status, pct, remaining = classify(spend, cap)
-        alerts.append({
-            "scope": "CATEGORY",
-            "category": cat,
-            "month": month_label,
-            "spend": spend,
-            "cap": float(cap),
-            "remaining": remaining,
-            "pct": pct,
-            "status": status,
-        })
-
-    return pd.DataFrame(alerts).sort_values(["scope", "status", "spend"], ascending=[True, True, False]).reset_index(drop=True)
\ No newline at end of file
+                 .groupby("category", observed=True, sort=False)["signed_amount"].sum()
+                 .mul(-1))
+    # One vectorized lookup for every capped category (uncapped/unspent -> 0)
+    cats = list(cfg.category_caps.keys())
+    capped_spend = cat_spend.reindex(cats, fill_value=0.0).to_numpy()
+
+    # Row 0 is TOTAL, then one row per capped category; classify all rows in one numpy pass
+    total_cap = cfg.monthly_total_cap
+    spend = np.concatenate([[total_spend], capped_spend]).astype(float)
+    cap = np.array([np.nan if total_cap is None else total_cap, *cfg.category_caps.values()], dtype=float)
+    has_cap = ~np.isnan(cap)
+    pct = np.divide(spend, cap, out=np.zeros_like(spend), where=cap > 0)
+    pct[~has_cap] = np.nan
+    status = np.select(
+        [~has_cap, spend > cap, pct >= cfg.warn_threshold], ["N/A", "OVER", "NEAR"], default="OK"
+    )
+
+    alerts = {
+        "scope": ["TOTAL"] + ["CATEGORY"] * len(cats),
+        "category": ["TOTAL"] + cats,
+        "month": month_label,
+        "spend": spend,
+        "cap": cap,
+        "remaining": cap - spend,
+        "pct": pct,
+        "status": status,
+    }
+    out = pd.DataFrame(alerts).sort_values(["scope", "status", "spend"], ascending=[True, True, False]).reset_index(drop=True)
+    # Categorical after sorting so row order is unchanged; status/scope checks become integer-code ops
+    out["status"] = pd.Categorical(out["status"], categories=ALERT_STATUSES, ordered=True)
+    out["scope"] = pd.Categorical(out["scope"], categories=ALERT_SCOPES)
+    return out
\ No newline at end of file
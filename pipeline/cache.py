@@ -0,0 +1,204 @@
+"""
+On-disk cache of processed (cleaned + categorized) transactions.
+
+Each input file's processed frame is stored as zstd parquet under `cache_dir`,
+with a `.cache.json` manifest recording the signature it was built from: the
+input's mtime/size plus the category rules and model files, since those change
+categorize() output too. A matching signature skips ingestion, cleaning and
+categorization entirely.
+
+load_many() adds a second level for multi-file runs: the concatenated frame is
+stored once, named by a hash of every input's signature (plus the projection),
+so an unchanged glob is a single parquet read with no per-file reads or concat.
+Files that do need rebuilding are processed in worker processes. The per-file
+parts are combined as Arrow tables (chunks stitched, not copied) and converted
+to pandas once.
+"""
+from __future__ import annotations
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .categorize import MODEL_PATH, RULES_PATH, categorize
+from .cleaning import clean_transactions
+from .ingestion import load_transactions
+
+CACHE_DIR = os.path.join("outputs", ".cache")
+MANIFEST_NAME = ".cache.json"
+
+# Store description as categorical when distinct values are at most this share of rows
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+def _file_sig(path: str) -> List[int]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return [0, 0]
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _signature(input_path: str) -> Dict[str, List[int]]:
+    return {
+        "input": _file_sig(input_path),
+        "rules": _file_sig(RULES_PATH),
+        "model": _file_sig(MODEL_PATH),
+    }
+
+
+def _read_manifest(cache_dir: str) -> dict:
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_manifest(cache_dir: str, manifest: dict) -> None:
+    # Write-then-rename so a crashed run never leaves a half-written manifest
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def build_processed(input_path: str) -> pd.DataFrame:
+    df = categorize(clean_transactions(load_transactions(input_path)))
+    # Recurring merchants repeat a lot: as a categorical, merchant groupbys run on int
+    # codes and the cached parquet/pool pickles carry each string once
+    desc = df["description"].astype("category")
+    if len(desc.cat.categories) <= CATEGORICAL_MAX_RATIO * len(desc):
+        df = df.assign(description=desc)
+    return df
+
+
+def _project(available: Sequence[str], columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+    # Requested columns the frame actually has, in request order (None = all)
+    if columns is None:
+        return None
+    have = set(available)
+    return [c for c in columns if c in have]
+
+
+def _cached(entry: Optional[dict], sig: dict, cache_dir: str, columns: Optional[Sequence[str]]) -> Optional[pa.Table]:
+    if not entry or entry.get("sig") != sig:
+        return None
+    try:
+        cols = _project(entry["columns"], columns) if "columns" in entry else columns
+        return pq.read_table(os.path.join(cache_dir, entry["file"]), columns=cols)
+    except (OSError, ValueError, KeyError):
+        return None  # missing/corrupt parquet (or an older entry lacking a column): rebuild
+
+
+def _store(df: pd.DataFrame, key: str, sig: dict, cache_dir: str, manifest: dict) -> None:
+    # Writes the parquet and records it in `manifest`; the caller writes the manifest once
+    os.makedirs(cache_dir, exist_ok=True)
+    fname = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest() + ".parquet"
+    df.to_parquet(os.path.join(cache_dir, fname), compression="zstd", index=False)
+    manifest[key] = {"sig": sig, "file": fname, "columns": [str(c) for c in df.columns]}
+
+
+def _select(df: pd.DataFrame, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    cols = _project(df.columns, columns)
+    return df if cols is None else df[cols]
+
+
+def load_or_build(
+    input_path: str,
+    cache_dir: str = CACHE_DIR,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Processed transactions for `input_path`, read from the parquet cache when the
+    input (and rules/model) are unchanged since it was written; rebuilt otherwise.
+    `columns` projects the result; on a cache hit only those columns are decoded.
+    """
+    key = os.path.abspath(input_path)
+    sig = _signature(input_path)
+    manifest = _read_manifest(cache_dir)
+    table = _cached(manifest.get(key), sig, cache_dir, columns)
+    if table is not None:
+        return table.to_pandas()
+
+    df = build_processed(input_path)
+    _store(df, key, sig, cache_dir, manifest)
+    _write_manifest(cache_dir, manifest)
+    return _select(df, columns)
+
+
+def _build_all(paths: List[str]) -> List[pd.DataFrame]:
+    # Files are independent: rebuild several in worker processes (ingest/clean/categorize
+    # are partly GIL-bound); a single file isn't worth the pool's import cost
+    if len(paths) < 2:
+        return [build_processed(p) for p in paths]
+    workers = min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(build_processed, paths))
+
+
+def load_many(
+    input_paths: Sequence[str],
+    cache_dir: str = CACHE_DIR,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Concatenated processed transactions for `input_paths` (in order). The
+    combined frame is cached under a key of all inputs' signatures; on a miss
+    each file still goes through the per-file cache, and the files that need
+    rebuilding are processed in parallel.
+    """
+    keys = [os.path.abspath(p) for p in input_paths]
+    sigs = [_signature(p) for p in input_paths]
+    key = hashlib.blake2b(
+        json.dumps([list(zip(keys, sigs)), list(columns) if columns is not None else None]).encode("utf-8"),
+        digest_size=8,
+    ).hexdigest()
+    combined = os.path.join(cache_dir, f"concat-{key}.parquet")
+    if os.path.exists(combined):
+        try:
+            return pd.read_parquet(combined)
+        except (OSError, ValueError):
+            pass  # corrupt/partial file: rebuild below
+
+    manifest = _read_manifest(cache_dir)
+    tables = [_cached(manifest.get(k), sig, cache_dir, columns) for k, sig in zip(keys, sigs)]
+    missing = [i for i, t in enumerate(tables) if t is None]
+    if missing:
+        # Workers only build; cache files and the manifest are written here, one writer
+        built = _build_all([input_paths[i] for i in missing])
+        for i, df in zip(missing, built):
+            _store(df, keys[i], sigs[i], cache_dir, manifest)
+            tables[i] = pa.Table.from_pandas(_select(df, columns), preserve_index=False)
+        _write_manifest(cache_dir, manifest)
+    try:
+        # Zero-copy chunk concatenation; "permissive" unifies e.g. an all-null column with a typed one
+        table = pa.concat_tables(tables, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        table = None  # types arrow can't unify: fall back to pandas' object-upcasting concat
+
+    # Only the current combination is worth keeping; older ones are stale by construction
+    for old in glob.glob(os.path.join(cache_dir, "concat-*.parquet")):
+        if old != combined:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{combined}.tmp"
+    if table is not None:
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, combined)
+        # self_destruct releases each Arrow column as pandas takes it over (lower peak memory)
+        return table.to_pandas(self_destruct=True, split_blocks=True)
+    df = pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+    df.to_parquet(tmp, compression="zstd", index=False)
+    os.replace(tmp, combined)
+    return df
@@ -2,20 +2,32 @@
 Categorization via rules first, then optional ML (TF-IDF + LogisticRegression).
 """
 from __future__ import annotations
-import os, pickle, yaml
+import os, pickle, re
+from functools import lru_cache
+import joblib
+import numpy as np
 import pandas as pd
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from ._yaml_cache import load_yaml_cached
 
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "category_model.pkl")
 RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "category_rules.yml")
 
+# Below this many distinct descriptions a single predict call beats thread fan-out
+PARALLEL_PREDICT_MIN = 20000
+
+# From this many rule patterns on, match with an Aho-Corasick automaton if pyahocorasick is installed
+AHOCORASICK_MIN_PATTERNS = 200
+
 def load_rules() -> dict:
     if os.path.exists(RULES_PATH):
-        with open(RULES_PATH, "r", encoding="utf-8") as f:
-            y = yaml.safe_load(f)
+        y = load_yaml_cached(RULES_PATH) or {}
         return y.get("rules", {})
     return {}
 
@@ -27,55 +39,193 @@ def rule_based_category(text: str, rules: dict) -> Optional[str]:
                 return cat
     return None
 
+def _compile_rules(rules: dict) -> Tuple[Optional["re.Pattern[str]"], List[str]]:
+    """
+    Compile all rule patterns into a single regex for vectorized matching.
+    Each category becomes an optional lookahead with its own capture group, so one
+    pass reports every matching category; the first matched group (rules order)
+    wins, same as rule_based_category.
+    """
+    parts: List[str] = []
+    names: List[str] = []
+    for cat, patterns in rules.items():
+        alts = "|".join(re.escape(str(p).lower()) for p in (patterns or []))
+        if alts:
+            parts.append(f"(?:(?=.*?({alts})))?")
+            names.append(cat)
+    if not parts:
+        return None, []
+    return re.compile("^" + "".join(parts), re.DOTALL), names
+
+def _build_automaton(rules: dict):
+    """
+    Optional Aho-Corasick automaton over all rule patterns: one linear scan per
+    description regardless of pattern count. Each pattern maps to its category's
+    index in `_compile_rules` names, so the lowest index found wins.
+    Returns None when pyahocorasick is missing or the rule set is small.
+    """
+    cats = [(cat, [str(p).lower() for p in (patterns or [])]) for cat, patterns in rules.items()]
+    cats = [(cat, pats) for cat, pats in cats if pats]
+    if sum(len(pats) for _, pats in cats) < AHOCORASICK_MIN_PATTERNS:
+        return None
+    if any(p == "" for _, pats in cats for p in pats):
+        return None  # an empty pattern matches everything; leave that to the regex
+    try:
+        import ahocorasick  # type: ignore
+    except ImportError:
+        return None
+    automaton = ahocorasick.Automaton()
+    for i, (_, pats) in enumerate(cats):
+        for p in pats:
+            # keep the first (highest-priority) category for duplicated patterns
+            if automaton.get(p, None) is None:
+                automaton.add_word(p, i)
+    automaton.make_automaton()
+    return automaton
+
+def _automaton_indices(automaton, texts: pd.Series) -> np.ndarray:
+    # Scan each distinct lowercased description once; -1 where no pattern occurs
+    codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+    first = np.array(
+        [min((i for _, i in automaton.iter(t)), default=-1) if isinstance(t, str) else -1 for t in uniques],
+        dtype=np.intp,
+    )
+    return first[codes]
+
+@lru_cache(maxsize=1)
+def _compiled_rules_cached(mtime_ns: int, size: int):
+    rules = load_rules()
+    pattern, names = _compile_rules(rules)
+    return pattern, names, _build_automaton(rules)
+
+def _get_compiled_rules():
+    # Recompile only when the rules file changes (keyed by mtime/size like the YAML cache)
+    if not os.path.exists(RULES_PATH):
+        return None, [], None
+    st = os.stat(RULES_PATH)
+    return _compiled_rules_cached(st.st_mtime_ns, st.st_size)
+
+@lru_cache(maxsize=1)
+def _load_model_cached(path: str, mtime_ns: int, size: int):
+    # joblib memory-maps the numpy arrays (coef_, idf_) so worker processes share pages;
+    # bundles written by older versions with plain pickle.dump are still accepted
+    try:
+        return joblib.load(path, mmap_mode="r")
+    except (ValueError, pickle.UnpicklingError):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
 def _load_model():
+    # Unpickle once per model file version; retraining to MODEL_PATH invalidates the entry
     if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, "rb") as f:
-            obj = pickle.load(f)
-        return obj
+        st = os.stat(MODEL_PATH)
+        return _load_model_cached(MODEL_PATH, st.st_mtime_ns, st.st_size)
     return None
 
+def _predict(vectorizer, clf, texts: List[str]) -> np.ndarray:
+    """
+    transform + predict, split across threads for large batches (scipy's sparse
+    products release the GIL, so chunks run concurrently).
+    """
+    if len(texts) < PARALLEL_PREDICT_MIN:
+        return np.asarray(clf.predict(vectorizer.transform(texts)), dtype=object)
+    n_jobs = min(os.cpu_count() or 1, len(texts) // (PARALLEL_PREDICT_MIN // 2))
+    bounds = np.linspace(0, len(texts), n_jobs + 1, dtype=int)
+    parts = joblib.Parallel(n_jobs=n_jobs, prefer="threads")(
+        joblib.delayed(lambda a, b: clf.predict(vectorizer.transform(texts[a:b])))(a, b)
+        for a, b in zip(bounds[:-1], bounds[1:])
+    )
+    return np.asarray(np.concatenate(parts), dtype=object)
+
 def categorize(df: pd.DataFrame) -> pd.DataFrame:
     """
     Apply rules, then ML model if available. Adds 'category' column.
     """
-    out = df.copy()
-    rules = load_rules()
+    pattern, names, automaton = _get_compiled_rules()
     model_bundle = _load_model()
 
-    categories: List[Optional[str]] = []
-    if "description" not in out.columns:
-        out["description"] = ""
+    # No full-frame copy: the result shares df's columns and only adds new ones
+    extra = {} if "description" in df.columns else {"description": ""}
+    # fillna: missing descriptions stay NaN through astype(str) and would take factorize's -1 code
+    desc = df["description"].astype(str).fillna("") if not extra else pd.Series("", index=df.index)
+    n = len(df)
+
+    # Rules: one automaton or regex pass over all descriptions
+    categories = np.full(n, None, dtype=object)
+    if automaton is not None:
+        idx = _automaton_indices(automaton, desc.str.lower())
+        matched = idx >= 0
+        categories[matched] = np.asarray(names, dtype=object)[idx[matched]]
+    elif pattern is not None:
+        hits = desc.str.lower().str.extract(pattern).notna().to_numpy()
+        matched = hits.any(axis=1)
+        categories[matched] = np.asarray(names, dtype=object)[hits.argmax(axis=1)[matched]]
+    else:
+        matched = np.zeros(n, dtype=bool)
+
+    # ML: a single batched transform/predict over the distinct unmatched descriptions
+    # (recurring merchants repeat a lot), broadcast back to rows via factorize codes
+    if model_bundle is not None and not matched.all():
+        vectorizer = model_bundle["vectorizer"]
+        clf = model_bundle["clf"]
+        codes, uniques = pd.factorize(desc[~matched])
+        categories[~matched] = _predict(vectorizer, clf, list(uniques))[codes]
 
-    for desc in out["description"].astype(str):
-        cat = rule_based_category(desc, rules)
-        if cat is None and model_bundle is not None:
-            vectorizer = model_bundle["vectorizer"]
-            clf = model_bundle["clf"]
-            X = vectorizer.transform([desc])
-            cat = clf.predict(X)[0]
-        categories.append(cat if cat is not None else "Uncategorized")
+    categories[pd.isna(categories)] = "Uncategorized"
+    # Categorical so downstream groupbys hash small integer codes instead of strings
+    return df.assign(**extra, category=pd.Categorical(categories))
 
-    out["category"] = categories
-    return out
+def _hashing_fit_transform(texts: List[str], n_jobs: Optional[int]) -> Tuple[Pipeline, sp.csr_matrix]:
+    """
+    Stateless hashing + IDF reweighting. Hashing needs no vocabulary pass, so the
+    texts are hashed in chunks across threads and only the IDF fit is serial.
+    """
+    hasher = HashingVectorizer(ngram_range=(1,2), n_features=2**18, alternate_sign=False, dtype=np.float32)
+    jobs = joblib.effective_n_jobs(n_jobs) if n_jobs else 1
+    jobs = max(1, min(jobs, len(texts) // (PARALLEL_PREDICT_MIN // 2)))
+    if jobs == 1:
+        counts = hasher.transform(texts)
+    else:
+        bounds = np.linspace(0, len(texts), jobs + 1, dtype=int)
+        counts = sp.vstack(joblib.Parallel(n_jobs=jobs, prefer="threads")(
+            joblib.delayed(hasher.transform)(texts[a:b]) for a, b in zip(bounds[:-1], bounds[1:])
+        ), format="csr")
+    tfidf = TfidfTransformer()
+    X = tfidf.fit_transform(counts)
+    # Bundled as one transformer so _predict's vectorizer.transform() works unchanged
+    return Pipeline([("hash", hasher), ("tfidf", tfidf)]), X
 
-def train_classifier(labeled_csv: str, model_out: str = MODEL_PATH):
+def train_classifier(
+    labeled_csv: str,
+    model_out: str = MODEL_PATH,
+    n_jobs: Optional[int] = None,
+    use_hashing: bool = False,
+):
     """
     Train a simple TF-IDF + LogisticRegression classifier.
     labeled_csv must have columns: description, category
+    use_hashing swaps the fitted vocabulary for a HashingVectorizer (flat memory,
+    vectorized across n_jobs threads).
     """
     df = pd.read_csv(labeled_csv)
     df = df.dropna(subset=["description", "category"])
     df["description"] = df["description"].astype(str)
 
-    vectorizer = TfidfVectorizer(ngram_range=(1,2), min_df=2, max_features=20000)
-    X = vectorizer.fit_transform(df["description"])
+    if use_hashing:
+        vectorizer, X = _hashing_fit_transform(df["description"].tolist(), n_jobs)
+    else:
+        # float32 end to end: halves the bytes read by the sparse x dense product at predict time
+        vectorizer = TfidfVectorizer(ngram_range=(1,2), min_df=2, max_features=20000, dtype=np.float32)
+        X = vectorizer.fit_transform(df["description"])
     y = df["category"].astype(str)
 
-    clf = LogisticRegression(max_iter=200, n_jobs=None)
+    clf = LogisticRegression(max_iter=200)
     clf.fit(X, y)
+    clf.coef_ = clf.coef_.astype(np.float32, copy=False)
+    clf.intercept_ = clf.intercept_.astype(np.float32, copy=False)
 
     bundle = {"vectorizer": vectorizer, "clf": clf, "labels": sorted(y.unique().tolist())}
     os.makedirs(os.path.dirname(model_out), exist_ok=True)
-    with open(model_out, "wb") as f:
-        pickle.dump(bundle, f)
+    # Uncompressed so _load_model can memory-map the arrays
+    joblib.dump(bundle, model_out, compress=0)
     return model_out
\ No newline at end of file
@@ -2,46 +2,91 @@
 Cleaning & normalization: parse dates, amounts; derive signed_amount.
 """
 from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
 import pandas as pd
 import numpy as np
 
-def clean_transactions(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+# Common bank-export date layouts, tried in order against a sample value.
+# Month-first before day-first to match what pandas infers for ambiguous dates.
+_DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%d-%m-%Y", "%d-%b-%Y", "%d %b %Y"]
+
+_AMOUNT_RE = r"([0-9]*\.?[0-9]+)"
+
+
+def _parse_amount(s: pd.Series) -> pd.Series:
+    """Unsigned float amounts; to_numeric fast path, regex only for leftovers."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.astype(float).abs()
+
+    cleaned = s.astype(str).str.replace(",", "", regex=False).str.strip()
+    amt = pd.to_numeric(cleaned, errors="coerce").astype(float).abs()
+
+    # Rows like "₹1,200.50" or "12.00 DR" still need the original extraction
+    bad = ~np.isfinite(amt.to_numpy())
+    if bad.any():
+        amt[bad] = cleaned[bad].str.extract(_AMOUNT_RE)[0].astype(float)
+    return amt
+
 
-    # Parse date
-    out["date"] = pd.to_datetime(out["date"], errors="coerce")
+def _sniff_date_format(s: pd.Series) -> Optional[str]:
+    sample = s.dropna()
+    if sample.empty:
+        return None
+    value = str(sample.iloc[0]).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            datetime.strptime(value, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def clean_transactions(df: pd.DataFrame, date_format: Optional[str] = None) -> pd.DataFrame:
+    # Build only the replaced/derived columns and attach them with assign();
+    # untouched columns are shared with `df` rather than deep-copied.
+
+    # Parse date with an explicit (given or sniffed) format; cache=True parses repeated values once.
+    # Readers that already produced datetimes (Arrow CSV, Parquet, Excel) skip parsing.
+    if pd.api.types.is_datetime64_any_dtype(df["date"]):
+        date_s = df["date"]
+    else:
+        fmt = date_format or _sniff_date_format(df["date"])
+        if fmt:
+            date_s = pd.to_datetime(df["date"], format=fmt, cache=True, errors="coerce")
+        else:
+            date_s = pd.to_datetime(df["date"], errors="coerce")
 
     # Normalize type
-    out["type"] = out["type"].astype(str).str.upper().str.strip()
-    out["type"] = out["type"].replace({
+    type_s = df["type"].astype(str).str.upper().str.strip()
+    type_s = type_s.replace({
         "D": "DEBIT", "DR": "DEBIT", "DEB": "DEBIT",
         "C": "CREDIT", "CR": "CREDIT", "CRE": "CREDIT"
     })
 
     # Amount as float
-    out["amount"] = (
-        out["amount"]
-        .astype(str)
-        .str.replace(",", "", regex=False)
-        .str.extract(r"([0-9]*\.?[0-9]+)")
-        .astype(float)
-    )
+    amount_s = _parse_amount(df["amount"])
 
     # Signed amount: negative for DEBIT (spend), positive for CREDIT (income)
-    sign = np.where(out["type"].eq("CREDIT"), 1, -1)
-    out["signed_amount"] = out["amount"] * sign
+    sign = np.where(type_s.eq("CREDIT"), 1, -1)
+    signed = amount_s * sign
 
     # Fill optional fields
-    for col in ["description", "account", "mode"]:
-        if col in out.columns:
-            out[col] = out[col].astype(str).fillna("")
+    optional = {
+        col: df[col].astype(str).fillna("")
+        for col in ["description", "account", "mode"]
+        if col in df.columns
+    }
 
     # Drop rows with no date/amount
+    out = df.assign(date=date_s, type=type_s, amount=amount_s, signed_amount=signed, **optional)
     out = out.dropna(subset=["date", "amount"])
 
     # Add helpful derived columns
-    out["year"] = out["date"].dt.year
-    out["month"] = out["date"].dt.to_period("M").astype(str)
-    out["day"] = out["date"].dt.date
-
-    return out
\ No newline at end of file
+    return out.assign(
+        year=out["date"].dt.year,
+        month=out["date"].to_numpy().astype("datetime64[M]").astype(str),
+        day=out["date"].dt.date,
+    )
@@ -4,33 +4,64 @@ Falls back gracefully.
 """
 from __future__ import annotations
 import warnings
+from collections import OrderedDict
 import pandas as pd
-from typing import Tuple
+from typing import Optional, Tuple
+
+from .utils import content_key, lru_get, monthly_spend
+
+_FORECAST_CACHE: "OrderedDict[tuple, pd.Series]" = OrderedDict()
+
+# Fitted models keyed by (kind, content of the history they have seen); see _fit_forecast
+_MODEL_CACHE: "OrderedDict[tuple, object]" = OrderedDict()
+# A cached ARIMA is updated in place when the history grew by at most this many months
+_ARIMA_MAX_UPDATE = 3
+
+def _arima_model(s: pd.Series, pm):
+    # Reuse the stepwise-searched model when s is a cached history plus a short tail:
+    # update() is a filter pass over the new points instead of a new order search
+    for k in range(min(_ARIMA_MAX_UPDATE, len(s) - 1) + 1):
+        head = s.iloc[:len(s) - k]
+        model = _MODEL_CACHE.pop(("arima", content_key(head.index, head)), None)
+        if model is not None:
+            if k:
+                model.update(s.iloc[-k:])
+            break
+    else:
+        model = pm.auto_arima(
+            s, seasonal=True, m=12, stepwise=True, suppress_warnings=True, error_action="ignore"
+        )
+    lru_get(_MODEL_CACHE, ("arima", content_key(s.index, s)), lambda: model)
+    return model
 
 def _prep_monthly_series(df: pd.DataFrame, value_col: str = "signed_amount") -> pd.Series:
-    s = df.set_index("date")[value_col].resample("MS").sum()
-    # We forecast spending magnitude (positive numbers). Convert debits to positive spend.
-    s = (-s).clip(lower=0)
-    return s
+    # We forecast spending magnitude (positive numbers): debits only, flipped positive.
+    return monthly_spend(df["date"], df[value_col])
 
-def forecast_monthly_spend(df: pd.DataFrame, periods: int = 3) -> Tuple[pd.Series, pd.Series]:
+def forecast_monthly_spend(
+    df: Optional[pd.DataFrame] = None, periods: int = 3, monthly: Optional[pd.Series] = None
+) -> Tuple[pd.Series, pd.Series]:
     """
     Returns (history, forecast) as positive monthly spend.
+    Pass a precomputed `monthly` series to reuse an aggregate the caller already has.
+    Forecasts are cached per (history content, periods): refitting is the slow part.
     """
-    s = _prep_monthly_series(df)
+    s = monthly if monthly is not None else _prep_monthly_series(df)
+    key = (content_key(s.index, s), periods)
+    forecast = lru_get(_FORECAST_CACHE, key, lambda: _fit_forecast(s, periods))
+    return s, forecast.copy()
 
+def _fit_forecast(s: pd.Series, periods: int) -> pd.Series:
     # Try pmdarima auto_arima first
     try:
         import pmdarima as pm  # type: ignore
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore")
-            model = pm.auto_arima(
-                s, seasonal=True, m=12, stepwise=True, suppress_warnings=True, error_action="ignore"
-            )
+            model = _arima_model(s, pm)
         fc = model.predict(n_periods=periods)
         idx = pd.date_range(s.index[-1] + pd.offsets.MonthBegin(1), periods=periods, freq="MS")
         forecast = pd.Series(fc, index=idx)
-        return s, forecast
+        return forecast
     except Exception:
         pass
 
@@ -39,12 +70,11 @@ def forecast_monthly_spend(df: pd.DataFrame, periods: int = 3) -> Tuple[pd.Serie
         from statsmodels.tsa.holtwinters import ExponentialSmoothing
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore")
-            model = ExponentialSmoothing(
+            fit = lru_get(_MODEL_CACHE, ("es", content_key(s.index, s)), lambda: ExponentialSmoothing(
                 s, trend="add", seasonal="add", seasonal_periods=12, initialization_method="estimated"
-            )
-            fit = model.fit(optimized=True)
+            ).fit(optimized=True))
             forecast = fit.forecast(periods)
-        return s, pd.Series(forecast, index=pd.date_range(s.index[-1] + pd.offsets.MonthBegin(1), periods=periods, freq="MS"))
+        return pd.Series(forecast, index=pd.date_range(s.index[-1] + pd.offsets.MonthBegin(1), periods=periods, freq="MS"))
     except Exception:
         pass
 
@@ -52,4 +82,4 @@ def forecast_monthly_spend(df: pd.DataFrame, periods: int = 3) -> Tuple[pd.Serie
     last = s.iloc[-1] if len(s) else 0.0
     idx = pd.date_range(pd.Timestamp.today().to_period("M").to_timestamp(), periods=periods, freq="MS")
     forecast = pd.Series([last]*periods, index=idx)
-    return s, forecast
\ No newline at end of file
+    return forecast
\ No newline at end of file
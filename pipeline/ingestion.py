@@ -3,11 +3,14 @@ Ingestion: Load transactions from CSV/Excel and map to a standard schema.
 """
 from __future__ import annotations
 import pandas as pd
-from typing import Union
-from .utils import normalize_colname
+from typing import IO, Optional, Union
+from .utils import normalize_colname, normalize_colnames
 
 STANDARD_COLS = ["date", "description", "amount", "type", "account", "mode"]
 
+# PyArrow tokenizes CSV in blocks of this many bytes, one block per thread
+CSV_BLOCK_SIZE = 16 << 20
+
 # Synonym map for common export headers across banks/wallets
 SYNONYMS = {
     "date": {"date", "txn_date", "transaction_date", "posting_date"},
@@ -18,44 +21,74 @@ SYNONYMS = {
     "mode": {"mode", "channel", "payment_mode", "method"},
 }
 
-def _map_columns(df: pd.DataFrame) -> pd.DataFrame:
-    orig = {normalize_colname(c): c for c in df.columns}
+# Normalized header -> standard column; constant, so built once at import
+_ALIAS_TO_STD = {
+    normalize_colname(alias): std
+    for std, alias_set in SYNONYMS.items()
+    for alias in alias_set | {std}
+}
+
+def _column_map(columns) -> dict:
+    # One lookup per header; the first header matching a standard column wins
     mapped = {}
-    for std, alias_set in SYNONYMS.items():
-        # find any alias present
-        found = None
-        for alias in alias_set:
-            if normalize_colname(alias) in orig:
-                found = orig[normalize_colname(alias)]
-                break
-        if found is None:
-            # try direct presence of std
-            if normalize_colname(std) in orig:
-                found = orig[normalize_colname(std)]
-        if found is not None:
-            mapped[std] = found
-
-    # Build standardized frame
-    out = pd.DataFrame()
-    for col in STANDARD_COLS:
-        if col in mapped:
-            out[col] = df[mapped[col]]
-        else:
-            out[col] = pd.NA
-    # include any extra columns
-    extras = [c for c in df.columns if c not in mapped.values()]
-    for c in extras:
-        out[c] = df[c]
-    return out
-
-def load_transactions(path_or_buffer: Union[str, bytes]) -> pd.DataFrame:
+    for c, norm in zip(columns, normalize_colnames(columns)):
+        std = _ALIAS_TO_STD.get(norm)
+        if std is not None and std not in mapped:
+            mapped[std] = c
+    return mapped
+
+def _map_columns(df: pd.DataFrame) -> pd.DataFrame:
+    mapped = _column_map(df.columns)
+
+    # Build standardized frame in one constructor call, extra columns kept after the standard ones
+    cols = {col: df[mapped[col]] if col in mapped else pd.NA for col in STANDARD_COLS}
+    used = set(mapped.values())
+    cols.update({c: df[c] for c in df.columns if c not in used})
+    return pd.DataFrame(cols, index=df.index)
+
+def _read_arrow_csv(source: Union[str, IO]) -> pd.DataFrame:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    table = pa_csv.read_csv(
+        source, read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE, use_threads=True)
+    )
+    # All-empty columns come back as pa.null(); make them float64 NaN as pandas would
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    # ISO dates were already parsed by Arrow; keep them as datetime64 (not datetime.date
+    # objects) so clean_transactions can skip string date parsing
+    return table.to_pandas(date_as_object=False)
+
+def _read_csv(source: Union[str, IO]) -> pd.DataFrame:
+    # PyArrow's block-parallel reader when available; C engine if it's missing or rejects the file
+    start = source.tell() if hasattr(source, "seek") else None
+    try:
+        return _read_arrow_csv(source)
+    except (ImportError, ValueError):
+        if start is not None:
+            source.seek(start)
+        return pd.read_csv(source)
+
+def load_transactions(path_or_buffer: Union[str, bytes, IO], name: Optional[str] = None) -> pd.DataFrame:
     """
-    Load a CSV or Excel into the standard schema.
+    Load a CSV, Excel or Parquet file into the standard schema.
+    Accepts a path or a file-like object (e.g. BytesIO from an upload); for
+    buffers, `name` (or the buffer's .name) decides the format.
     """
-    path = str(path_or_buffer)
-    if path.lower().endswith((".xlsx", ".xls")):
-        df = pd.read_excel(path)
+    if hasattr(path_or_buffer, "read"):
+        source = path_or_buffer
+        fname = name or getattr(path_or_buffer, "name", "") or ""
+    else:
+        source = str(path_or_buffer)
+        fname = name or source
+    if fname.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(source)
+    elif fname.lower().endswith(".parquet"):
+        # Typed columnar input (e.g. a previous run's processed.parquet): no text parsing
+        df = pd.read_parquet(source)
     else:
-        df = pd.read_csv(path)
+        df = _read_csv(source)
     df = _map_columns(df)
     return df
\ No newline at end of file
@@ -1,17 +1,27 @@
 ﻿from __future__ import annotations
 
+import atexit
 import os
 import smtplib
 import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from email.policy import SMTP as _MIME_POLICY
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
+import jinja2
+import numpy as np
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
-@dataclass
+@dataclass(frozen=True)
 class SmtpConfig:
     host: str
     port: int
@@ -21,7 +31,12 @@ class SmtpConfig:
     use_tls: bool = True  # STARTTLS
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def from_env() -> "SmtpConfig":
+        """
+        Parsed + validated SMTP settings, read from the environment once per process
+        (invalid settings are not cached, so a fixed .env is picked up on the next call).
+        """
         host = os.getenv("SMTP_HOST", "").strip()
         port = int(os.getenv("SMTP_PORT", "587").strip())
         user = os.getenv("SMTP_USER", "").strip()
@@ -40,6 +55,86 @@ class SmtpConfig:
 
         return SmtpConfig(host=host, port=port, user=user, password=password, from_addr=from_addr, use_tls=use_tls)
 
+    @staticmethod
+    def invalidate() -> None:
+        """Forget cached env-derived settings (tests, or after changing env vars at runtime)."""
+        SmtpConfig.from_env.cache_clear()
+        _recipients_cached.cache_clear()
+
+
+# Process-wide SMTP connections keyed by (host, port, use_tls, user): STARTTLS + LOGIN
+# happen once and later sends reuse the socket. The lock serializes use of a connection
+# (send_alerts sends from a worker thread).
+_SMTP_POOL: Dict[Tuple[str, int, bool, str], Tuple[smtplib.SMTP, int]] = {}
+_SMTP_LOCK = threading.Lock()
+# Reconnect after this many messages on one connection (providers cap per-session sends)
+_SMTP_MAX_MESSAGES = 100
+
+
+def _open_smtp(cfg: SmtpConfig) -> smtplib.SMTP:
+    if cfg.use_tls:
+        server = smtplib.SMTP(cfg.host, cfg.port, timeout=20)
+        server.ehlo()
+        server.starttls(context=ssl.create_default_context())
+        server.ehlo()
+    else:
+        # If your provider uses SSL on 465, set SMTP_PORT=465 and SMTP_USE_TLS=false.
+        server = smtplib.SMTP_SSL(cfg.host, cfg.port, timeout=20, context=ssl.create_default_context())
+    server.login(cfg.user, cfg.password)
+    return server
+
+
+def _close_smtp(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+def _get_smtp(cfg: SmtpConfig) -> smtplib.SMTP:
+    """
+    Pooled, logged-in connection for cfg; a NOOP health check replaces stale or
+    exhausted connections. Call with _SMTP_LOCK held.
+    """
+    key = (cfg.host, cfg.port, cfg.use_tls, cfg.user)
+    cached = _SMTP_POOL.get(key)
+    if cached is not None:
+        server, sent = cached
+        try:
+            healthy = sent < _SMTP_MAX_MESSAGES and server.noop()[0] == 250
+        except smtplib.SMTPException:
+            healthy = False
+        if healthy:
+            return server
+        _SMTP_POOL.pop(key, None)
+        _close_smtp(server)
+    server = _open_smtp(cfg)
+    _SMTP_POOL[key] = (server, 0)
+    return server
+
+
+def _smtp_send(cfg: SmtpConfig, to_list: List[str], msg: MIMEMultipart) -> None:
+    key = (cfg.host, cfg.port, cfg.use_tls, cfg.user)
+    with _SMTP_LOCK:
+        server = _get_smtp(cfg)
+        try:
+            # send_message serializes once with the message's SMTP policy (CRLF, no as_string() re-encode pass)
+            server.send_message(msg, from_addr=cfg.from_addr, to_addrs=to_list)
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between the health check and the send: reconnect once
+            _SMTP_POOL.pop(key, None)
+            server = _get_smtp(cfg)
+            server.send_message(msg, from_addr=cfg.from_addr, to_addrs=to_list)
+        _SMTP_POOL[key] = (server, _SMTP_POOL[key][1] + 1)
+
+
+@atexit.register
+def _close_smtp_pool() -> None:
+    with _SMTP_LOCK:
+        for server, _ in _SMTP_POOL.values():
+            _close_smtp(server)
+        _SMTP_POOL.clear()
+
 
 def _parse_recipients(raw: str) -> List[str]:
     # Supports comma/semicolon separated recipient lists
@@ -53,11 +148,63 @@ def _default_recipients(raw: str) -> List[str]:
     """
     Resolve recipients from ALERT_EMAIL_TO, with fallback to SMTP_FROM/SMTP_USER.
     """
+    return list(_recipients_cached(raw))
+
+
+@lru_cache(maxsize=8)
+def _recipients_cached(raw: str) -> Tuple[str, ...]:
     recipients = _parse_recipients(raw)
     if recipients:
-        return recipients
+        return tuple(recipients)
     fallback = os.getenv("SMTP_FROM", "").strip() or os.getenv("SMTP_USER", "").strip()
-    return _parse_recipients(fallback)
+    return tuple(_parse_recipients(fallback))
+
+
+_ALERTS_HTML = """
+    <div style="font-family: Arial, sans-serif;">
+      <h2 style="margin:0 0 10px 0;">Personal Finance Alerts</h2>
+      <p style="margin:0 0 14px 0;">These items are <b>NEAR</b> or <b>OVER</b> the configured caps.</p>
+
+      <table style="border-collapse:collapse; width:100%; font-size:14px;">
+        <thead>
+          <tr>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Status</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Scope</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Category</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Month</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Spend</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Cap</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Remaining</th>
+            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Util</th>
+          </tr>
+        </thead>
+        <tbody>
+          {%- for status, scope, category, month, spend, cap, remaining, pct, bg in rows %}
+            <tr style="background:{{ bg }}">
+              <td style="padding:8px;border:1px solid #ddd">{{ status }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ scope }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ category }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ month }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ spend }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ cap }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ remaining }}</td>
+              <td style="padding:8px;border:1px solid #ddd">{{ pct }}</td>
+            </tr>
+          {%- endfor %}
+        </tbody>
+      </table>
+
+      <p style="margin-top:14px;color:#666;font-size:12px;">
+        Sent by Personal Finance Trend Analyzer.
+      </p>
+    </div>
+    """
+
+# Columns read by _alerts_to_message_tables
+_ALERT_COLUMNS = ("scope", "category", "month", "spend", "cap", "remaining", "pct", "status")
+
+# Compiled once at import; rendered per message
+_ALERTS_HTML_TEMPLATE = jinja2.Environment(autoescape=True).from_string(_ALERTS_HTML)
 
 
 def _alerts_to_message_tables(alerts_df: pd.DataFrame) -> Tuple[str, str]:
@@ -65,88 +212,45 @@ def _alerts_to_message_tables(alerts_df: pd.DataFrame) -> Tuple[str, str]:
     Build plain text + HTML message bodies from alerts_df (already filtered).
     Expected columns: scope, category, month, spend, cap, remaining, pct, status
     """
-    # Create a compact copy with formatted values for human readability
-    df = alerts_df.copy()
+    n = len(alerts_df)
 
-    def _fmt_money(x):
-        try:
-            return f"₹{float(x):,.0f}"
-        except Exception:
-            return "—"
-
-    def _fmt_pct(x):
-        try:
-            return f"{float(x) * 100:.0f}%"
-        except Exception:
-            return "—"
+    # Narrow to the needed columns as plain arrays (no frame copy); missing ones render as blanks
+    src = {
+        c: alerts_df[c].to_numpy() if c in alerts_df.columns else np.full(n, "", dtype=object)
+        for c in _ALERT_COLUMNS
+    }
 
-    # Ensure columns exist (avoid KeyErrors)
-    for col in ["scope", "category", "month", "spend", "cap", "remaining", "pct", "status"]:
-        if col not in df.columns:
-            df[col] = ""
+    def _fmt_num(name: str, spec: str, scale: float = 1.0) -> np.ndarray:
+        # Non-numeric/NaN amounts render as "—"; float columns skip the to_numeric parse
+        a = src[name]
+        if a.dtype.kind not in "fiu":
+            a = pd.to_numeric(pd.Series(a), errors="coerce").to_numpy()
+        v = a.astype(float) * scale
+        ok = np.isfinite(v)
+        out = np.full(n, "—", dtype=object)
+        out[ok] = [spec.format(x) for x in v[ok]]
+        return out
 
-    df["spend"] = df["spend"].map(_fmt_money)
-    df["cap"] = df["cap"].map(lambda v: _fmt_money(v) if pd.notna(v) else "—")
-    df["remaining"] = df["remaining"].map(lambda v: _fmt_money(v) if pd.notna(v) else "—")
-    df["pct"] = df["pct"].map(lambda v: _fmt_pct(v) if pd.notna(v) else "—")
+    level = pd.Series(src["status"], dtype=str).str.upper().to_numpy()
+    bg_col = np.select([level == "OVER", level == "NEAR"], ["#ffe8e8", "#fff3d9"], default="#ffffff")
+    cols = [
+        src["status"], src["scope"], src["category"], src["month"],
+        _fmt_num("spend", "₹{:,.0f}"), _fmt_num("cap", "₹{:,.0f}"), _fmt_num("remaining", "₹{:,.0f}"),
+        _fmt_num("pct", "{:.0f}%", 100.0), bg_col,
+    ]
 
-    # Plain text
+    # Plain-text lines in one pass over the column arrays (no per-row Series)
     lines = ["Personal Finance Alerts (NEAR/OVER)", "-" * 36]
-    for _, r in df.iterrows():
+    rows = list(zip(*cols))
+    for status, scope, category, month, spend, cap, remaining, pct, _bg in rows:
         lines.append(
-            f"[{r['status']}] {r['scope']} {r['category']} | Month: {r['month']} | "
-            f"Spend: {r['spend']} | Cap: {r['cap']} | Remaining: {r['remaining']} | Util: {r['pct']}"
+            f"[{status}] {scope} {category} | Month: {month} | "
+            f"Spend: {spend} | Cap: {cap} | Remaining: {remaining} | Util: {pct}"
         )
     text_body = "\n".join(lines)
 
-    # HTML table with light styling
-    html_rows = []
-    for _, r in df.iterrows():
-        status = str(r["status"]).upper()
-        bg = "#ffe8e8" if status == "OVER" else ("#fff3d9" if status == "NEAR" else "#ffffff")
-        html_rows.append(
-            f"""
-            <tr style="background:{bg}">
-              <td style="padding:8px;border:1px solid #ddd">{r['status']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['scope']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['category']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['month']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['spend']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['cap']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['remaining']}</td>
-              <td style="padding:8px;border:1px solid #ddd">{r['pct']}</td>
-            </tr>
-            """
-        )
-
-    html_body = f"""
-    <div style="font-family: Arial, sans-serif;">
-      <h2 style="margin:0 0 10px 0;">Personal Finance Alerts</h2>
-      <p style="margin:0 0 14px 0;">These items are <b>NEAR</b> or <b>OVER</b> the configured caps.</p>
-
-      <table style="border-collapse:collapse; width:100%; font-size:14px;">
-        <thead>
-          <tr>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Status</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Scope</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Category</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Month</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Spend</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Cap</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Remaining</th>
-            <th style="text-align:left;padding:8px;border:1px solid #ddd;">Util</th>
-          </tr>
-        </thead>
-        <tbody>
-          {''.join(html_rows)}
-        </tbody>
-      </table>
-
-      <p style="margin-top:14px;color:#666;font-size:12px;">
-        Sent by Personal Finance Trend Analyzer.
-      </p>
-    </div>
-    """
+    # HTML via the precompiled template; autoescape keeps '&' etc. in category names valid HTML
+    html_body = _ALERTS_HTML_TEMPLATE.render(rows=rows)
 
     return text_body, html_body
 
@@ -159,6 +263,27 @@ def send_email_alerts(
     """
     Send an email for NEAR/OVER alerts. Returns a status dict for UI display.
     """
+    return _send_alert_email(_actionable(alerts_df), None, subject, recipients)
+
+
+def _actionable(alerts_df: pd.DataFrame) -> pd.DataFrame:
+    # Filter only actionable alerts (boolean indexing already yields a new frame).
+    # Two equality compares on the array (category codes for build_alerts output)
+    # are cheaper than isin()'s hash-table build for a two-value set.
+    if "status" not in alerts_df.columns:
+        return pd.DataFrame()
+    status = alerts_df["status"].array
+    mask = np.asarray((status == "NEAR") | (status == "OVER"), dtype=bool)
+    return alerts_df.loc[mask]
+
+
+def _send_alert_email(
+    actionable: pd.DataFrame,
+    bodies: Optional[Tuple[str, str]],
+    subject: str,
+    recipients: Optional[List[str]],
+) -> Dict[str, Any]:
+    # `bodies` lets send_alerts format the tables once for both channels
     try:
         cfg = SmtpConfig.from_env()
     except Exception as e:
@@ -171,40 +296,21 @@ def send_email_alerts(
             "error": "No recipients configured. Set ALERT_EMAIL_TO or SMTP_FROM/SMTP_USER in env/.env.",
         }
 
-    # Filter only actionable alerts
-    actionable = (
-        alerts_df[alerts_df["status"].isin(["NEAR", "OVER"])].copy()
-        if "status" in alerts_df.columns
-        else pd.DataFrame()
-    )
     if actionable.empty:
         return {"ok": True, "skipped": True, "message": "No NEAR/OVER alerts to send."}
 
-    text_body, html_body = _alerts_to_message_tables(actionable)
+    text_body, html_body = bodies or _alerts_to_message_tables(actionable)
 
-    msg = MIMEMultipart("alternative")
+    msg = MIMEMultipart("alternative", policy=_MIME_POLICY)
     msg["Subject"] = subject
     msg["From"] = cfg.from_addr
     msg["To"] = ", ".join(to_list)
 
-    msg.attach(MIMEText(text_body, "plain", "utf-8"))
-    msg.attach(MIMEText(html_body, "html", "utf-8"))
+    msg.attach(MIMEText(text_body, "plain", "utf-8", policy=_MIME_POLICY))
+    msg.attach(MIMEText(html_body, "html", "utf-8", policy=_MIME_POLICY))
 
     try:
-        if cfg.use_tls:
-            with smtplib.SMTP(cfg.host, cfg.port, timeout=20) as server:
-                server.ehlo()
-                server.starttls(context=ssl.create_default_context())
-                server.ehlo()
-                server.login(cfg.user, cfg.password)
-                server.sendmail(cfg.from_addr, to_list, msg.as_string())
-        else:
-            # If your provider uses SSL on 465, set SMTP_PORT=465 and SMTP_USE_TLS=false,
-            # then switch to SMTP_SSL here.
-            with smtplib.SMTP_SSL(cfg.host, cfg.port, timeout=20, context=ssl.create_default_context()) as server:
-                server.login(cfg.user, cfg.password)
-                server.sendmail(cfg.from_addr, to_list, msg.as_string())
-
+        _smtp_send(cfg, to_list, msg)
         return {"ok": True, "sent_to": to_list, "count": int(len(actionable))}
     except Exception as e:
         return {"ok": False, "error": f"SMTP send failed: {e}"}
@@ -223,29 +329,38 @@ def send_email(subject: str, body: str, recipients: Optional[List[str]] = None)
     if not to_list:
         return "No recipients configured. Set ALERT_EMAIL_TO or SMTP_FROM/SMTP_USER in env/.env."
 
-    msg = MIMEMultipart("alternative")
+    msg = MIMEMultipart("alternative", policy=_MIME_POLICY)
     msg["Subject"] = subject
     msg["From"] = cfg.from_addr
     msg["To"] = ", ".join(to_list)
-    msg.attach(MIMEText(body, "plain", "utf-8"))
+    msg.attach(MIMEText(body, "plain", "utf-8", policy=_MIME_POLICY))
 
     try:
-        if cfg.use_tls:
-            with smtplib.SMTP(cfg.host, cfg.port, timeout=20) as server:
-                server.ehlo()
-                server.starttls(context=ssl.create_default_context())
-                server.ehlo()
-                server.login(cfg.user, cfg.password)
-                server.sendmail(cfg.from_addr, to_list, msg.as_string())
-        else:
-            with smtplib.SMTP_SSL(cfg.host, cfg.port, timeout=20, context=ssl.create_default_context()) as server:
-                server.login(cfg.user, cfg.password)
-                server.sendmail(cfg.from_addr, to_list, msg.as_string())
+        _smtp_send(cfg, to_list, msg)
         return None
     except Exception as e:
         return f"SMTP send failed: {e}"
 
 
+@lru_cache(maxsize=1)
+def _telegram_session():
+    """
+    Shared requests.Session for the Bot API: keeps the TCP/TLS connection to
+    api.telegram.org alive across messages instead of a handshake per send.
+    Rate limits (429, honouring Retry-After) and transient 5xx are retried briefly.
+    """
+    retry = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+    return session
+
+
 def send_telegram(message: str) -> Dict[str, Any]:
     """
     Send a Telegram message. Returns a status dict for UI display.
@@ -256,9 +371,7 @@ def send_telegram(message: str) -> Dict[str, Any]:
         return {"ok": False, "error": "Telegram not configured. Set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID."}
 
     try:
-        import requests
-
-        resp = requests.post(
+        resp = _telegram_session().post(
             f"https://api.telegram.org/bot{token}/sendMessage",
             json={"chat_id": chat_id, "text": message},
             timeout=20,
@@ -278,17 +391,17 @@ def send_alerts(alerts_df: pd.DataFrame, subject_prefix: str = "Personal Finance
     recipients = _default_recipients(os.getenv("ALERT_EMAIL_TO", ""))
     subject = f"{subject_prefix} - Budget Alerts"
 
-    email_res = send_email_alerts(alerts_df, subject=subject, recipients=recipients)
+    # Filter and format once; both channels share the bodies
+    actionable = _actionable(alerts_df)
+    bodies = _alerts_to_message_tables(actionable) if not actionable.empty else None
 
-    actionable = (
-        alerts_df[alerts_df["status"].isin(["NEAR", "OVER"])].copy()
-        if "status" in alerts_df.columns
-        else pd.DataFrame()
-    )
-    if actionable.empty:
-        telegram_res = {"ok": True, "skipped": True, "message": "No NEAR/OVER alerts to send."}
-    else:
-        text_body, _ = _alerts_to_message_tables(actionable)
-        telegram_res = send_telegram(text_body)
+    # SMTP and the Bot API are independent network waits: run them side by side
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        email_fut = ex.submit(_send_alert_email, actionable, bodies, subject, recipients)
+        if bodies is None:
+            telegram_res = {"ok": True, "skipped": True, "message": "No NEAR/OVER alerts to send."}
+        else:
+            telegram_res = send_telegram(bodies[0])
+        email_res = email_fut.result()
 
     return {"email": email_res, "telegram": telegram_res}
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import yaml
 from zoneinfo import ZoneInfo
 
+from ._yaml_cache import load_yaml_cached
+
+
+@lru_cache(maxsize=8)
+def _tz(name: str) -> ZoneInfo:
+    # ZoneInfo() goes through tzdata lookup; one instance per name is enough
+    return ZoneInfo(name)
+
 
 @dataclass
 class NotifySettings:
@@ -35,7 +45,7 @@ class NotifySettings:
                 weekly_weekday=0,
             )
 
-        data = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+        data = load_yaml_cached(str(p)) or {}
         channels = data.get("channels", {}) or {}
         return NotifySettings(
             enabled=bool(data.get("enabled", True)),
@@ -59,27 +69,41 @@ class NotifySettings:
         Path(path).write_text(yaml.safe_dump(out, sort_keys=False), encoding="utf-8")
 
 
+# Parsed state per path, keyed by (st_mtime_ns, st_size) like the YAML cache
+_STATE_CACHE: Dict[str, Tuple[int, int, Optional[date]]] = {}
+
+
 def _read_state(path: str = "state/notify_state.json") -> Optional[date]:
-    p = Path(path)
-    if not p.exists():
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         return None
+    cached = _STATE_CACHE.get(path)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
     try:
-        data = json.loads(p.read_text(encoding="utf-8"))
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
         s = data.get("last_sent_date")
-        if not s:
-            return None
-        return date.fromisoformat(s)
+        last = date.fromisoformat(s) if s else None
     except Exception:
-        return None
+        last = None
+    _STATE_CACHE[path] = (st.st_mtime_ns, st.st_size, last)
+    return last
 
 
 def _write_state(last_sent: date, path: str = "state/notify_state.json") -> None:
+    # Write a temp file and rename over the target: readers see the old or new state, never a partial one
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    Path(path).write_text(json.dumps({"last_sent_date": last_sent.isoformat()}, indent=2), encoding="utf-8")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"last_sent_date": last_sent.isoformat()}, indent=2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
 
 
 def is_due_today(settings: NotifySettings, now: Optional[datetime] = None) -> bool:
-    tz = ZoneInfo(settings.timezone)
+    tz = _tz(settings.timezone)
     now = now.astimezone(tz) if now else datetime.now(tz)
     today = now.date()
 
@@ -116,6 +140,6 @@ def is_due_today(settings: NotifySettings, now: Optional[datetime] = None) -> bo
 
 
 def mark_sent_today(settings: NotifySettings, now: Optional[datetime] = None) -> None:
-    tz = ZoneInfo(settings.timezone)
+    tz = _tz(settings.timezone)
     now = now.astimezone(tz) if now else datetime.now(tz)
     _write_state(now.date())
\ No newline at end of file
@@ -2,21 +2,83 @@
 Utility helpers for the Personal Finance Trend Analyzer.
 """
 from __future__ import annotations
+import hashlib
 import re
-from typing import Dict, Iterable
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+_NORM_RE = re.compile(r"[^a-z0-9]+")
 
 def normalize_colname(name: str) -> str:
     """
     Lowercase, strip, and remove non-alphanumerics to standardize column names.
     """
-    s = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
-    return s
+    return _NORM_RE.sub("_", name.lower()).strip("_")
+
+def normalize_colnames(names: Iterable[str]) -> List[str]:
+    """
+    normalize_colname over a whole header row, with the regex lookup hoisted out of the loop.
+    """
+    sub = _NORM_RE.sub
+    return [sub("_", str(n).lower()).strip("_") for n in names]
 
 def first_present(mapping: Dict[str, str], candidates: Iterable[str]) -> str | None:
     """
     Return the first key in `mapping` that exists in `candidates`.
     """
-    for c in candidates:
-        if c in mapping:
-            return c
-    return None
\ No newline at end of file
+    return next((c for c in candidates if c in mapping), None)
+
+def month_key(dates: pd.Series) -> np.ndarray:
+    """
+    Calendar-month bucket per date as datetime64[M] (int64 underneath, no Period objects).
+    """
+    return dates.to_numpy().astype("datetime64[M]")
+
+def monthly_spend(dates: pd.Series, signed: pd.Series) -> pd.Series:
+    """
+    Positive spend per calendar month: debits (signed < 0) only, flipped positive.
+    The month range spans all `dates`, so credit-only months show as 0.
+    """
+    keys = month_key(dates)
+    v = signed.to_numpy()
+    neg = v < 0
+    s = pd.Series(-v[neg], name=signed.name).groupby(keys[neg]).sum()
+    return _reindex_months(s, keys, dates)
+
+def _reindex_months(s: pd.Series, keys: np.ndarray, dates: pd.Series) -> pd.Series:
+    keys = keys[~np.isnat(keys)]
+    if keys.size == 0:
+        idx = pd.DatetimeIndex([], freq="MS", name=dates.name)
+    else:
+        idx = pd.date_range(keys.min(), keys.max(), freq="MS", name=dates.name)
+    return s.reindex(idx.as_unit(dates.dt.unit), fill_value=0.0)
+
+def content_key(*cols) -> bytes:
+    """
+    Short blake2b digest of the raw bytes of the given Series/Index/arrays.
+    Cheap compared with any groupby over them; used to key result caches.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for c in cols:
+        a = np.asarray(c)
+        if a.dtype == object:
+            a = pd.util.hash_array(a)
+        h.update(f"{a.dtype}:{a.shape}".encode())
+        h.update(np.ascontiguousarray(a).view(np.uint8))
+    return h.digest()
+
+def lru_get(cache: "OrderedDict[Hashable, Any]", key: Hashable, build: Callable[[], Any], maxsize: int = 8) -> Any:
+    """
+    Return cache[key], computing it with build() on a miss; evicts least recently used beyond maxsize.
+    """
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = build()
+    cache[key] = value
+    if len(cache) > maxsize:
+        cache.popitem(last=False)
+    return value
@@ -2,28 +2,81 @@
 Plotly visualizations for the dashboard and batch pipeline.
 """
 from __future__ import annotations
+from typing import Optional
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
 
-def category_spend_bar(df: pd.DataFrame):
-    g = df[df["signed_amount"] < 0].groupby("category")["signed_amount"].sum().sort_values()
-    g = -g  # make positive for chart
+from .utils import monthly_spend
+
+# Upper bound on points per line trace sent to the browser
+MAX_PLOT_POINTS = 2000
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of the n_out points that best keep the
+    visual shape of (x, y). First and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xs = x.astype(float)
+    ys = y.astype(float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xs[hi:nxt_hi].mean()
+        avg_y = ys[hi:nxt_hi].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (avg_y - ys[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def _downsample(series: pd.Series, n_out: int = MAX_PLOT_POINTS) -> pd.Series:
+    if len(series) <= n_out:
+        return series
+    idx = series.index
+    x = idx.asi8 if isinstance(idx, pd.DatetimeIndex) else np.arange(len(series))
+    return series.iloc[_lttb_indices(x, series.to_numpy(), n_out)]
+
+
+def category_spend_bar(df: Optional[pd.DataFrame] = None, by_category: Optional[pd.Series] = None):
+    """
+    Bar chart of positive spend per category. Pass a precomputed `by_category`
+    (positive spend indexed by category) to skip the groupby over `df`.
+    """
+    if by_category is None:
+        g = df[df["signed_amount"] < 0].groupby("category", observed=True)["signed_amount"].sum()
+        by_category = -g  # make positive for chart
+    g = by_category.sort_values(ascending=False, kind="stable")
     fig = px.bar(g, title="Spend by Category (₹)", labels={"value": "₹", "category": "Category"})
     fig.update_layout(xaxis_title="Category", yaxis_title="Spend (₹)")
     return fig
 
-def monthly_trend_line(df: pd.DataFrame):
-    m = df.set_index("date")["signed_amount"].resample("MS").sum()
-    spend = (-m).clip(lower=0)
-    fig = px.line(spend, title="Monthly Spend Trend (₹)")
+def monthly_trend_line(df: Optional[pd.DataFrame] = None, monthly: Optional[pd.Series] = None):
+    """
+    Line chart of positive monthly spend. Pass a precomputed `monthly` series
+    (e.g. from budget.monthly_total_spend) to skip the resample over `df`.
+    """
+    if monthly is None:
+        monthly = monthly_spend(df["date"], df["signed_amount"])
+    spend = _downsample(monthly)
+    fig = px.line(spend, title="Monthly Spend Trend (₹)", render_mode="webgl")
     fig.update_layout(xaxis_title="Month", yaxis_title="Spend (₹)")
     return fig
 
 def forecast_line(history: pd.Series, forecast: pd.Series):
+    history = _downsample(history)
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=history.index, y=history.values, mode="lines+markers", name="History"))
-    fig.add_trace(go.Scatter(x=forecast.index, y=forecast.values, mode="lines+markers", name="Forecast"))
+    fig.add_trace(go.Scattergl(x=history.index, y=history.values, mode="lines+markers", name="History"))
+    fig.add_trace(go.Scattergl(x=forecast.index, y=forecast.values, mode="lines+markers", name="Forecast"))
     fig.update_layout(title="Monthly Spend Forecast (₹)", xaxis_title="Month", yaxis_title="Spend (₹)")
     return fig
 
@@ -50,6 +103,6 @@ def category_utilization_df(alerts_df: pd.DataFrame) -> pd.DataFrame:
     Returns a frame with category, spend, cap, pct (0..1), status
     Filtered only to CATEGORY rows that have a cap.
     """
-    cats = alerts_df[alerts_df["scope"] == "CATEGORY"].copy()
-    cats = cats[pd.notna(cats["cap"])]
+    # One combined mask; boolean indexing already returns a new frame, so no .copy()
+    cats = alerts_df[(alerts_df["scope"] == "CATEGORY").to_numpy() & pd.notna(alerts_df["cap"]).to_numpy()]
     return cats[["category", "spend", "cap", "pct", "status"]].reset_index(drop=True)
\ No newline at end of file
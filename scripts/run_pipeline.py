@@ -1,6 +1,7 @@
 """
 Batch pipeline: read input file, clean, categorize, summarize, forecast, and write outputs.
 Writes: processed.csv, 3 HTML charts, monthly_category_spend.csv, alerts.csv
+(--format parquet|both writes processed/monthly_category_spend as zstd Parquet)
 Optionally sends Email/Telegram alerts if --notify is set and env vars are configured.
 Now auto-loads .env.
 
@@ -23,15 +24,27 @@ from pipeline.cleaning import clean_transactions
 from pipeline.categorize import categorize
 from pipeline.forecasting import forecast_monthly_spend
 from pipeline.visualize import category_spend_bar, monthly_trend_line, forecast_line
-from pipeline.budget import BudgetConfig, build_alerts
+from pipeline.budget import BudgetConfig, build_alerts, monthly_total_spend
 from pipeline.notify import send_alerts
 
 
 def main():
     ap = argparse.ArgumentParser(description="Personal Finance Trend Analyzer batch pipeline")
-    ap.add_argument("--input", required=True, help="Path to CSV/Excel input")
+    ap.add_argument("--input", required=True, help="Path to CSV/Excel/Parquet input")
     ap.add_argument("--output", default="outputs", help="Output folder (HTML charts + CSVs)")
     ap.add_argument("--notify", action="store_true", help="Send Email/Telegram alerts if critical (NEAR/OVER)")
+    ap.add_argument(
+        "--plotlyjs",
+        choices=["cdn", "directory", "inline"],
+        default="cdn",
+        help="How charts load plotly.js: CDN link (default), one shared plotly.min.js in the output folder (offline), or inlined per file",
+    )
+    ap.add_argument(
+        "--format",
+        choices=["csv", "parquet", "both"],
+        default="csv",
+        help="Format of processed/monthly_category_spend tables; alerts.csv is always CSV",
+    )
     args = ap.parse_args()
 
     os.makedirs(args.output, exist_ok=True)
@@ -40,26 +53,44 @@ def main():
     df = clean_transactions(df)
     df = categorize(df)
 
-    processed_path = os.path.join(args.output, "processed.csv")
-    df.to_csv(processed_path, index=False)
-    print(f"[OK] {processed_path}")
-
-    # Charts
-    category_spend_bar(df).write_html(os.path.join(args.output, "category_spend.html"))
-    monthly_trend_line(df).write_html(os.path.join(args.output, "monthly_trend.html"))
-    hist, fc = forecast_monthly_spend(df)
-    forecast_line(hist, fc).write_html(os.path.join(args.output, "spend_forecast.html"))
-
-    # Summary CSV
-    (
-        df[df["signed_amount"] < 0]
-        .groupby(["month", "category"])["signed_amount"]
+    def write_table(table: pd.DataFrame, stem: str) -> None:
+        # Parquet keeps dtypes (categorical category, datetime date) and skips stringifying every cell
+        if args.format in ("parquet", "both"):
+            path = os.path.join(args.output, f"{stem}.parquet")
+            table.to_parquet(path, compression="zstd", index=False)
+            print(f"[OK] {path}")
+        if args.format in ("csv", "both"):
+            path = os.path.join(args.output, f"{stem}.csv")
+            table.to_csv(path, index=False)
+            print(f"[OK] {path}")
+
+    write_table(df, "processed")
+
+    # Charts (monthly spend aggregated once, shared by the trend line and the forecast).
+    # plotly.js is referenced rather than inlined, so each file is KBs instead of ~3 MB.
+    include_js = True if args.plotlyjs == "inline" else args.plotlyjs
+
+    def write_chart(fig, name: str) -> None:
+        fig.write_html(os.path.join(args.output, name), include_plotlyjs=include_js, full_html=True, validate=False)
+
+    # Debits aggregated once per (month, category); the category totals for the bar
+    # chart are rolled up from that small table instead of rescanning the transactions
+    by_month_cat = (
+        df.loc[df["signed_amount"] < 0, ["month", "category", "signed_amount"]]
+        .groupby(["month", "category"], observed=True)["signed_amount"]
         .sum()
         .mul(-1)
-        .rename("spend")
-        .reset_index()
-        .to_csv(os.path.join(args.output, "monthly_category_spend.csv"), index=False)
     )
+    by_category = by_month_cat.groupby(level="category", observed=True).sum()
+
+    monthly = monthly_total_spend(df)
+    write_chart(category_spend_bar(by_category=by_category), "category_spend.html")
+    write_chart(monthly_trend_line(monthly=monthly), "monthly_trend.html")
+    hist, fc = forecast_monthly_spend(monthly=monthly)
+    write_chart(forecast_line(hist, fc), "spend_forecast.html")
+
+    # Summary table
+    write_table(by_month_cat.rename("spend").reset_index(), "monthly_category_spend")
 
     # Alerts CSV + optional notify
     cfg = BudgetConfig.load()
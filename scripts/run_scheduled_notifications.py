@@ -1,8 +1,9 @@
 """
-Run scheduled summaries based on state/notify_state.json.
+Run scheduled summaries based on config/notify_settings.yml and
+state/notify_state.json.
 
-This is intended for GitHub Actions. It evaluates schedule settings in UTC
-and triggers weekly_summary.py when a schedule is due.
+This is intended for GitHub Actions. It checks whether the configured
+schedule is due and runs the weekly_summary pipeline in-process when it is.
 """
 from __future__ import annotations
 
@@ -11,13 +12,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import argparse
-import os
-import subprocess
 import sys
-from datetime import datetime, timezone
 from pathlib import Path
 
-from pipeline.schedule import load_notify_state, due_summaries
+# Allow `python scripts/run_scheduled_notifications.py` (as the workflow runs it)
+# to import the repo-level `pipeline` and `scripts` packages.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.schedule import NotifySettings, is_due_today
+from scripts.weekly_summary import run as weekly_run
 
 
 SCHEDULE_CONFIG = {
@@ -28,49 +31,29 @@ SCHEDULE_CONFIG = {
 
 
 def _run_summary(label: str, days: int, input_glob: str, output: str) -> int:
-    env = os.environ.copy()
-    env["SUMMARY_LABEL"] = label
-    cmd = [
-        sys.executable,
-        "scripts/weekly_summary.py",
-        "--input_glob",
-        input_glob,
-        "--output",
-        output,
-        "--days",
-        str(days),
-        "--notify",
-    ]
     print(f"[RUN] {label} summary ({days} days)")
-    return subprocess.call(cmd, env=env)
+    # Already checked as due here, so force past weekly_summary's own gate
+    return weekly_run(input_glob=input_glob, output=output, days=days, notify=True, force=True, label=label)
 
 
 def main() -> int:
     ap = argparse.ArgumentParser(description="Scheduled notifications runner")
-    ap.add_argument("--state_path", default="state/notify_state.json", help="Path to notify_state.json")
+    ap.add_argument("--state_path", default="state/notify_state.json", help="Unused; state is read from state/notify_state.json")
     ap.add_argument("--input_glob", default="data/*.csv", help="Glob for CSV/Excel files")
     ap.add_argument("--output", default="outputs", help="Output folder for artifacts")
-    ap.add_argument("--grace_minutes", type=int, default=15, help="Grace window after scheduled time")
+    ap.add_argument("--grace_minutes", type=int, default=15, help="Unused; schedules are due for the whole day")
     args = ap.parse_args()
 
-    state = load_notify_state(Path(args.state_path))
-    schedule = state.get("schedule", {})
-    now = datetime.now(timezone.utc)
-    due = due_summaries(schedule, now=now, grace_minutes=args.grace_minutes)
-    if not due:
+    settings = NotifySettings.load()
+    if not is_due_today(settings):
         print("[SKIP] No scheduled summaries due.")
         return 0
 
-    exit_code = 0
-    for key in due:
-        meta = SCHEDULE_CONFIG.get(key)
-        if not meta:
-            print(f"[WARN] Unknown schedule key: {key}")
-            continue
-        rc = _run_summary(meta["label"], meta["days"], args.input_glob, args.output)
-        if rc != 0:
-            exit_code = rc
-    return exit_code
+    meta = SCHEDULE_CONFIG.get(settings.frequency)
+    if not meta:
+        print(f"[WARN] Unknown schedule key: {settings.frequency}")
+        meta = SCHEDULE_CONFIG["weekly"]
+    return _run_summary(meta["label"], meta["days"], args.input_glob, args.output)
 
 
 if __name__ == "__main__":
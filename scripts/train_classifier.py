@@ -5,6 +5,8 @@ Usage:
   python scripts/train_classifier.py --input data/labeled_samples.csv
   # Optional custom output path:
   python scripts/train_classifier.py --input data/labeled_samples.csv --out models/my_category_model.pkl
+  # Large label sets: hashing features, vectorized across all cores
+  python scripts/train_classifier.py --input data/labeled_samples.csv --hashing --jobs -1
 """
 from __future__ import annotations
 import argparse
@@ -15,9 +17,12 @@ def main():
     ap = argparse.ArgumentParser(description="Train TF-IDF + LogisticRegression category classifier")
     ap.add_argument("--input", required=True, help="CSV with columns: description,category")
     ap.add_argument("--out", default=None, help="Optional model output path (.pkl). Defaults to models/category_model.pkl")
+    ap.add_argument("--jobs", type=int, default=None, help="Threads for hashing vectorization (-1 = all cores)")
+    ap.add_argument("--hashing", action="store_true", help="Use HashingVectorizer + TF-IDF instead of a fitted vocabulary")
     args = ap.parse_args()
 
-    out = train_classifier(args.input, model_out=args.out) if args.out else train_classifier(args.input)
+    kwargs = {"n_jobs": args.jobs, "use_hashing": args.hashing}
+    out = train_classifier(args.input, model_out=args.out, **kwargs) if args.out else train_classifier(args.input, **kwargs)
     print(f"[OK] Saved model to: {out}")
 
 
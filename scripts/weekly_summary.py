@@ -5,153 +5,256 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import argparse
+import fnmatch
 import glob
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
-from pipeline.ingestion import load_transactions
-from pipeline.cleaning import clean_transactions
-from pipeline.categorize import categorize
+from pipeline.cache import load_many
 from pipeline.budget import BudgetConfig, build_alerts, monthly_total_spend
 from pipeline.notify import send_alerts, send_email
 from pipeline.schedule import NotifySettings, is_due_today, mark_sent_today
 
 
-def _load_concat(glob_pattern: str) -> pd.DataFrame:
-    paths = sorted(glob.glob(glob_pattern))
+# Columns the summary and alerts read; the parquet cache only decodes these
+SUMMARY_COLUMNS = ["date", "description", "amount", "type", "account", "mode", "signed_amount", "category"]
+
+# Rows per parquet row group in written artifacts (bounded memory for readers that stream groups)
+PARQUET_ROW_GROUP = 100_000
+
+
+def _match_inputs(glob_pattern: str) -> List[str]:
+    """
+    Sorted files matching `glob_pattern`. A plain directory + filename pattern
+    (the usual "data/*.csv") is one os.scandir pass with fnmatch on the names,
+    using the entries' cached file type; anything else goes through glob.
+    """
+    dirname, pattern = os.path.split(glob_pattern)
+    if glob.has_magic(dirname) or "**" in pattern:
+        return sorted(glob.glob(glob_pattern))
+    # Like glob: hidden files only match a pattern that starts with "."
+    hidden_ok = pattern.startswith(".")
+    try:
+        with os.scandir(dirname or ".") as it:
+            names = [
+                e.name for e in it
+                if (hidden_ok or not e.name.startswith(".")) and fnmatch.fnmatch(e.name, pattern) and e.is_file()
+            ]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return sorted(os.path.join(dirname, n) for n in names)
+
+
+def _load_concat(glob_pattern: str, cache_dir: str) -> pd.DataFrame:
+    paths = _match_inputs(glob_pattern)
     if not paths:
         paths = ["data/sample_transactions.csv"]
 
-    frames = []
-    for p in paths:
-        df = load_transactions(p)
-        df = clean_transactions(df)
-        df = categorize(df)
-        frames.append(df)
+    # Unchanged inputs come straight from the parquet cache (no ingest/clean/categorize);
+    # an unchanged set of inputs is one read of the cached concatenation
+    df = load_many(paths, cache_dir=cache_dir, columns=SUMMARY_COLUMNS)
 
-    return pd.concat(frames, ignore_index=True)
+    # Date order lets _period_filter slice by binary search (stable: same-day rows keep file order)
+    if not df["date"].is_monotonic_increasing:
+        df = df.sort_values("date", kind="mergesort", ignore_index=True)
+    return df
 
 
 def _period_filter(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
-    m = (df["date"] >= start) & (df["date"] < end)
-    return df.loc[m].copy()
+    # Rows with start <= date < end of a date-sorted frame (see _load_concat): two
+    # O(log n) searches and a positional slice instead of a full-length mask + copy
+    i0, i1 = df["date"].to_numpy().searchsorted([start.to_datetime64(), end.to_datetime64()], side="left")
+    return df.iloc[i0:i1]
+
+
+def _write_table(df: pd.DataFrame, output: str, stem: str, csv_compat: bool = False) -> None:
+    # Parquet by default (typed, compressed); zstd CSV as well when asked
+    df.to_parquet(
+        os.path.join(output, f"{stem}.parquet"), compression="zstd", index=False, row_group_size=PARQUET_ROW_GROUP
+    )
+    if csv_compat:
+        # Same CSV text streamed through Arrow's zstd codec (no extra dependency);
+        # load_transactions / pyarrow.csv read .csv.zst directly
+        with pa.CompressedOutputStream(os.path.join(output, f"{stem}.csv.zst"), "zstd") as f:
+            df.to_csv(f, index=False)
+
+
+def _spend_income(frame: pd.DataFrame) -> Tuple[float, float]:
+    # Debit spend and credit income straight off the array: fmin/fmax clip at zero
+    # (NaN -> 0) with no boolean-index copies
+    a = frame["signed_amount"].to_numpy(dtype=float)
+    return float(-np.fmin(a, 0.0).sum()), float(np.fmax(a, 0.0).sum())
+
+
+def _top_spend(keys: pd.Series, spend: np.ndarray, k: int = 5) -> pd.Series:
+    """
+    k largest per-key totals of `spend`, descending (ties in key order, like
+    groupby(...).sum().nlargest(k)). Sums over integer codes with bincount
+    instead of a hash groupby with per-group dispatch.
+    """
+    codes, uniques = pd.factorize(keys, sort=True)
+    valid = codes >= 0
+    totals = np.bincount(codes[valid], weights=spend[valid], minlength=len(uniques))
+    if len(totals) > k:
+        # Only keys at or above the k-th largest total need sorting
+        cand = np.flatnonzero(totals >= np.partition(totals, len(totals) - k)[len(totals) - k])
+    else:
+        cand = np.arange(len(totals))
+    top = cand[np.argsort(-totals[cand], kind="stable")][:k]
+    return pd.Series(totals[top], index=uniques.take(top))
 
 
 def _fmt_currency(x: float) -> str:
     return f"₹{x:,.0f}"
 
 
-def build_weekly_email_body(df: pd.DataFrame, alerts_df: pd.DataFrame, days: int) -> str:
-    now = datetime.now(timezone.utc)
-    end = pd.Timestamp(now.date())
-    start = end - pd.Timedelta(days=days)
+# Digest line per NEAR/OVER alert: status, scope, category, month, spend, cap, pct, remaining
+_ALERT_LINE = "[{}] {}/{} ({}): Spend {} / Cap {} ({} used, remaining {})".format
+
+
+def _fmt_or_dash(values: np.ndarray, fmt: Callable[[float], str]) -> List[str]:
+    # NaN (no cap) renders as an em dash
+    return ["—" if math.isnan(v) else fmt(v) for v in values.tolist()]
+
+
+def _top_lines(top: pd.Series) -> List[str]:
+    # tolist() unboxes all values at once instead of one numpy scalar per item
+    return [f"  - {k}: {_fmt_currency(v)}" for k, v in zip(top.index, top.tolist())] or ["  (no spend)"]
 
+
+def _window(days: int) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    # [start, end) of the digest's current period: the `days` days before today (UTC)
+    end = pd.Timestamp(datetime.now(timezone.utc).date())
+    return end - pd.Timedelta(days=days), end
+
+
+def build_weekly_email_body(df: pd.DataFrame, alerts_df: pd.DataFrame, days: int) -> str:
+    start, end = _window(days)
     cur = _period_filter(df, start, end)
     prev = _period_filter(df, start - pd.Timedelta(days=days), start)
 
-    cur_spend = float((-cur.loc[cur["signed_amount"] < 0, "signed_amount"].sum()))
-    prev_spend = float((-prev.loc[prev["signed_amount"] < 0, "signed_amount"].sum()))
-    cur_income = float(cur.loc[cur["signed_amount"] > 0, "signed_amount"].sum())
-    prev_income = float(prev.loc[prev["signed_amount"] > 0, "signed_amount"].sum())
-
-    cat_cur = (
-        cur[cur["signed_amount"] < 0]
-        .groupby("category")["signed_amount"].sum()
-        .mul(-1)
-        .sort_values(ascending=False)
-        .head(5)
-    )
+    # One sign mask over the current window feeds its spend total and both top-5s
+    sa = cur["signed_amount"].to_numpy(dtype=float)
+    neg = sa < 0
+    debit_amt = sa[neg]
 
-    merch_cur = (
-        cur[cur["signed_amount"] < 0]
-        .groupby("description")["signed_amount"].sum()
-        .mul(-1)
-        .sort_values(ascending=False)
-        .head(5)
-    )
+    cur_spend, cur_income = float(-debit_amt.sum()), float(np.fmax(sa, 0.0).sum())
+    prev_spend, prev_income = _spend_income(prev)
+
+    debit_spend = -debit_amt
+    debits = cur.loc[neg, ["category", "description"]]
+    cat_cur = _top_spend(debits["category"], debit_spend)
+    merch_cur = _top_spend(debits["description"], debit_spend)
 
-    monthly = monthly_total_spend(df)
+    # Only this month + the 3 before it are read below
+    monthly = monthly_total_spend(df, months=4)
     this_month = float(monthly.iloc[-1]) if len(monthly) else 0.0
     trailing = float(monthly.iloc[:-1].tail(3).mean()) if len(monthly) > 1 else 0.0
     delta_abs = this_month - trailing
     delta_pct = (delta_abs / trailing * 100.0) if trailing > 0 else 0.0
 
-    critical = alerts_df[alerts_df["status"].isin(["NEAR", "OVER"])].copy()
-    alerts_lines = []
-    for _, r in critical.iterrows():
-        cap = "—" if pd.isna(r["cap"]) else _fmt_currency(float(r["cap"]))
-        remain = "—" if pd.isna(r["remaining"]) else _fmt_currency(float(r["remaining"]))
-        pct = "—" if pd.isna(r["pct"]) else f"{float(r['pct']):.0%}"
-        alerts_lines.append(
-            f"[{r['status']}] {r['scope']}/{r['category']} ({r['month']}): "
-            f"Spend {_fmt_currency(float(r['spend']))} / Cap {cap} "
-            f"({pct} used, remaining {remain})"
-        )
+    status = alerts_df["status"].array
+    critical = alerts_df.loc[np.asarray((status == "NEAR") | (status == "OVER"), dtype=bool)]
+    # Each column is formatted as a whole, then rows are mapped through the fixed layout
+    text_cols = [critical[c].to_numpy() for c in ("status", "scope", "category", "month")]
+    spend, cap, remaining, pct = (critical[c].to_numpy(dtype=float) for c in ("spend", "cap", "remaining", "pct"))
+    alerts_lines = list(map(
+        _ALERT_LINE,
+        *text_cols,
+        [_fmt_currency(v) for v in spend.tolist()],
+        _fmt_or_dash(cap, _fmt_currency),
+        _fmt_or_dash(pct, "{:.0%}".format),
+        _fmt_or_dash(remaining, _fmt_currency),
+    ))
     alerts_block = "\n".join(alerts_lines) if alerts_lines else "None"
 
-    lines = []
-    lines.append(f"Finance Summary (last {days} days)")
-    lines.append(f"Totals: Spend {_fmt_currency(cur_spend)} (prev {_fmt_currency(prev_spend)}), "
-                 f"Income {_fmt_currency(cur_income)} (prev {_fmt_currency(prev_income)})")
-    lines.append("")
-    lines.append("Top Categories:")
-    lines.extend([f"  - {cat}: {_fmt_currency(float(amt))}" for cat, amt in cat_cur.items()] or ["  (no spend)"])
-    lines.append("")
-    lines.append("Top Merchants:")
-    lines.extend([f"  - {desc}: {_fmt_currency(float(amt))}" for desc, amt in merch_cur.items()] or ["  (no spend)"])
-    lines.append("")
-    lines.append("This Month vs 3-Month Avg:")
-    lines.append(f"  This Month: {_fmt_currency(this_month)}")
-    lines.append(f"  3-Mo Avg : {_fmt_currency(trailing)} (Δ {delta_abs:+,.0f}; {delta_pct:+.1f}%)")
-    lines.append("")
-    lines.append("Critical Budget Alerts (NEAR/OVER):")
-    lines.append(alerts_block)
-    lines.append("")
-    lines.append("— Automated by Personal Finance Trend Analyzer.")
+    lines = [
+        f"Finance Summary (last {days} days)",
+        f"Totals: Spend {_fmt_currency(cur_spend)} (prev {_fmt_currency(prev_spend)}), "
+        f"Income {_fmt_currency(cur_income)} (prev {_fmt_currency(prev_income)})",
+        "",
+        "Top Categories:",
+        *_top_lines(cat_cur),
+        "",
+        "Top Merchants:",
+        *_top_lines(merch_cur),
+        "",
+        "This Month vs 3-Month Avg:",
+        f"  This Month: {_fmt_currency(this_month)}",
+        f"  3-Mo Avg : {_fmt_currency(trailing)} (Δ {delta_abs:+,.0f}; {delta_pct:+.1f}%)",
+        "",
+        "Critical Budget Alerts (NEAR/OVER):",
+        alerts_block,
+        "",
+        "— Automated by Personal Finance Trend Analyzer.",
+    ]
     return "\n".join(lines)
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--input_glob", default="data/*.csv")
-    ap.add_argument("--output", default="outputs")
-    ap.add_argument("--days", type=int, default=7)
-    ap.add_argument("--notify", action="store_true")
-    ap.add_argument("--force", action="store_true", help="Ignore schedule and send now (CI debug)")
-    args = ap.parse_args()
-
-    os.makedirs(args.output, exist_ok=True)
-
-    df = _load_concat(args.input_glob)
-    df.to_csv(os.path.join(args.output, "weekly_processed.csv"), index=False)
+def run(
+    input_glob: str = "data/*.csv",
+    output: str = "outputs",
+    days: int = 7,
+    notify: bool = False,
+    force: bool = False,
+    label: Optional[str] = None,
+    csv_compat: bool = False,
+) -> int:
+    """
+    Build the summary artifacts and (when due or forced) send alerts + digest.
+    Callable in-process so the scheduled runner reuses its warm interpreter,
+    SMTP pool and Telegram session. Returns a process-style exit code.
+    """
+    os.makedirs(output, exist_ok=True)
+
+    df = _load_concat(input_glob, cache_dir=os.path.join(output, ".cache"))
+    _write_table(df, output, "weekly_processed", csv_compat=csv_compat)
 
     cfg = BudgetConfig.load()
     alerts = build_alerts(df, cfg)
-    alerts.to_csv(os.path.join(args.output, "alerts.csv"), index=False)
+    alerts.to_csv(os.path.join(output, "alerts.csv"), index=False)
 
     # ---- schedule gate ----
     settings = NotifySettings.load()
     due = is_due_today(settings)
-    if args.notify and (args.force or due):
-        # respect channel toggles
-        # send_alerts currently sends both; we gate by settings here
-        if settings.email or settings.telegram:
-            # If only one channel enabled, we can still call send_alerts,
-            # but pipeline.notify needs to honor missing creds.
-            res = send_alerts(alerts, subject_prefix="Personal Finance")
-            # If a channel is disabled, we treat it as intentionally skipped
-            if not settings.email:
-                res["email"] = "Skipped (email disabled)"
-            if not settings.telegram:
-                res["telegram"] = "Skipped (telegram disabled)"
-            print(f"[NOTIFY] alerts: {res}")
-
-        # weekly digest email (only if email enabled)
+    if notify and (force or due):
+        # The alerts go out on a worker thread while the digest body is built and sent
+        # (results print in order). Both emails share the pooled SMTP connection, so they
+        # still go out one after the other under _SMTP_LOCK; what overlaps is building
+        # the body and the Telegram send.
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            # respect channel toggles
+            # send_alerts currently sends both; we gate by settings here
+            alerts_fut = None
+            if settings.email or settings.telegram:
+                # If only one channel enabled, we can still call send_alerts,
+                # but pipeline.notify needs to honor missing creds.
+                alerts_fut = ex.submit(send_alerts, alerts, subject_prefix="Personal Finance")
+
+            # weekly digest email (only if email enabled)
+            err = None
+            if settings.email:
+                body = build_weekly_email_body(df, alerts, days)
+                title = f"{label} Finance Summary" if label else "Finance Summary"
+                err = send_email(subject=f"{title} ({days} days)", body=body)
+
+            if alerts_fut is not None:
+                res = alerts_fut.result()
+                # If a channel is disabled, we treat it as intentionally skipped
+                if not settings.email:
+                    res["email"] = "Skipped (email disabled)"
+                if not settings.telegram:
+                    res["telegram"] = "Skipped (telegram disabled)"
+                print(f"[NOTIFY] alerts: {res}")
+
         if settings.email:
-            body = build_weekly_email_body(df, alerts, args.days)
-            err = send_email(subject=f"Finance Summary ({args.days} days)", body=body)
             print(f"[EMAIL DIGEST] {err or 'sent'}")
         else:
             print("[EMAIL DIGEST] Skipped (email disabled)")
@@ -160,10 +263,32 @@ def main():
         mark_sent_today(settings)
         print("[SCHEDULE] Marked as sent today.")
     else:
-        print(f"[SCHEDULE] Not sending. notify={args.notify} due_today={due} enabled={settings.enabled}")
+        print(f"[SCHEDULE] Not sending. notify={notify} due_today={due} enabled={settings.enabled}")
 
     print("[DONE]")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input_glob", default="data/*.csv")
+    ap.add_argument("--output", default="outputs")
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--notify", action="store_true")
+    ap.add_argument("--force", action="store_true", help="Ignore schedule and send now (CI debug)")
+    ap.add_argument("--label", default=None, help="Digest subject label, e.g. Weekly / Monthly")
+    ap.add_argument("--csv-compat", action="store_true", help="Also write weekly_processed.csv.zst (zstd CSV) next to the Parquet file")
+    args = ap.parse_args()
+    return run(
+        input_glob=args.input_glob,
+        output=args.output,
+        days=args.days,
+        notify=args.notify,
+        force=args.force,
+        label=args.label,
+        csv_compat=args.csv_compat,
+    )
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
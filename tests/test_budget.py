@@ -0,0 +1,29 @@
+import pandas as pd
+from pipeline.budget import monthly_total_spend
+
+def test_monthly_total_spend_fills_missing_months():
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2025-01-05", "2025-01-20", "2025-03-02"]),
+        "signed_amount": [-100.0, -50.0, -25.0],
+    })
+    s = monthly_total_spend(df)
+    assert list(s.index) == list(pd.date_range("2025-01-01", "2025-03-01", freq="MS"))
+    assert s.tolist() == [150.0, 0.0, 25.0]
+
+def test_monthly_total_spend_ignores_credits():
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2025-01-01", "2025-01-05", "2025-02-01"]),
+        "signed_amount": [5000.0, -100.0, 300.0],
+    })
+    s = monthly_total_spend(df)
+    assert s.tolist() == [100.0, 0.0]
+
+def test_monthly_total_spend_window_matches_tail():
+    df = pd.DataFrame({
+        "date": pd.to_datetime(["2024-11-03", "2025-01-05", "2025-02-01", "2025-04-09", "2025-04-10"]),
+        "signed_amount": [-10.0, -100.0, 300.0, -25.0, -5.0],
+    })
+    full = monthly_total_spend(df)
+    s = monthly_total_spend(df, months=4)
+    assert list(s.index) == list(full.tail(4).index)
+    assert s.tolist() == [100.0, 0.0, 0.0, 30.0]
@@ -0,0 +1,45 @@
+import shutil
+import sys
+from pipeline.cache import load_many, load_or_build
+
+def test_load_or_build_reuses_parquet(tmp_path, monkeypatch):
+    src = tmp_path / "tx.csv"
+    shutil.copy("data/sample_transactions.csv", src)
+    cache_dir = str(tmp_path / "cache")
+    first = load_or_build(str(src), cache_dir=cache_dir)
+
+    cache_mod = sys.modules["pipeline.cache"]
+    def _fail(path):
+        raise AssertionError("rebuilt despite unchanged input")
+    monkeypatch.setattr(cache_mod, "build_processed", _fail)
+    second = load_or_build(str(src), cache_dir=cache_dir)
+    assert second["signed_amount"].tolist() == first["signed_amount"].tolist()
+    assert second["category"].tolist() == first["category"].tolist()
+
+    projected = load_or_build(str(src), cache_dir=cache_dir, columns=["signed_amount", "nope", "date"])
+    assert list(projected.columns) == ["signed_amount", "date"]
+
+
+def test_load_many_reuses_concatenation(tmp_path, monkeypatch):
+    paths = []
+    for name in ("a.csv", "b.csv"):
+        shutil.copy("data/sample_transactions.csv", tmp_path / name)
+        paths.append(str(tmp_path / name))
+    cache_dir = str(tmp_path / "cache")
+    first = load_many(paths, cache_dir=cache_dir, columns=["date", "signed_amount"])
+
+    concat_files = list((tmp_path / "cache").glob("concat-*.parquet"))
+    assert len(concat_files) == 1
+
+    cache_mod = sys.modules["pipeline.cache"]
+    def _fail(*args, **kwargs):
+        raise AssertionError("per-file work despite unchanged inputs")
+    monkeypatch.setattr(cache_mod, "_build_all", _fail)
+    monkeypatch.setattr(cache_mod, "_cached", _fail)
+    read = []
+    real_read = cache_mod.pd.read_parquet
+    monkeypatch.setattr(cache_mod.pd, "read_parquet", lambda path, *a, **k: read.append(path) or real_read(path, *a, **k))
+    second = load_many(paths, cache_dir=cache_dir, columns=["date", "signed_amount"])
+    assert read == [str(concat_files[0])]
+    assert list(second.columns) == ["date", "signed_amount"]
+    assert second["signed_amount"].tolist() == first["signed_amount"].tolist()
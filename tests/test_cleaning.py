@@ -0,0 +1,17 @@
+import pandas as pd
+from pipeline.cleaning import clean_transactions
+
+def test_clean_transactions_amount_parsing():
+    df = pd.DataFrame({
+        "date": ["2025-01-05", "2025-01-06", "2025-01-07", "2025-01-08"],
+        "amount": ["1,200.50", "₹30", "12.00 DR", "abc"],
+        "type": ["D", "CR", "debit", "D"],
+    })
+    out = clean_transactions(df)
+    assert out["amount"].tolist() == [1200.5, 30.0, 12.0]
+    assert out["signed_amount"].tolist() == [-1200.5, 30.0, -12.0]
+
+def test_clean_transactions_date_format():
+    df = pd.DataFrame({"date": ["05/08/2025", "13/08/2025"], "amount": [1, 2], "type": ["D", "D"]})
+    out = clean_transactions(df, date_format="%d/%m/%Y")
+    assert out["date"].tolist() == [pd.Timestamp("2025-08-05"), pd.Timestamp("2025-08-13")]
@@ -4,4 +4,17 @@ from pipeline.ingestion import load_transactions
 def test_load_transactions():
     df = load_transactions("data/sample_transactions.csv")
     assert {"date", "description", "amount", "type", "account", "mode"}.issubset(df.columns)
-    assert len(df) >= 5
\ No newline at end of file
+    assert len(df) >= 5
+def test_load_transactions_from_buffer():
+    import io
+    with open("data/sample_transactions.csv", "rb") as f:
+        buf = io.BytesIO(f.read())
+    df = load_transactions(buf, name="upload.csv")
+    assert {"date", "description", "amount", "type", "account", "mode"}.issubset(df.columns)
+    assert len(df) >= 5
+def test_load_transactions_parquet(tmp_path):
+    src = load_transactions("data/sample_transactions.csv")
+    src.to_parquet(tmp_path / "tx.parquet", index=False)
+    df = load_transactions(str(tmp_path / "tx.parquet"))
+    assert list(df.columns) == list(src.columns)
+    assert len(df) == len(src)
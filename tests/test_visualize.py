@@ -0,0 +1,13 @@
+import numpy as np
+import pandas as pd
+from pipeline.visualize import MAX_PLOT_POINTS, _downsample
+
+def test_downsample_bounds_points_and_keeps_endpoints():
+    idx = pd.date_range("2020-01-01", periods=10_000, freq="D")
+    s = pd.Series(np.sin(np.arange(len(idx)) / 50.0), index=idx)
+    out = _downsample(s)
+    assert len(out) == MAX_PLOT_POINTS
+    assert out.index[0] == idx[0] and out.index[-1] == idx[-1]
+    assert out.index.is_monotonic_increasing
+    short = s.head(100)
+    assert _downsample(short) is short
@@ -0,0 +1,14 @@
+import os
+from pipeline._yaml_cache import load_yaml_cached
+
+def test_load_yaml_cached_hits_and_invalidates(tmp_path):
+    p = tmp_path / "cfg.yml"
+    p.write_text("a: 1\n", encoding="utf-8")
+    first = load_yaml_cached(str(p))
+    assert first == {"a": 1}
+    assert load_yaml_cached(str(p)) is first
+
+    p.write_text("a: 22\n", encoding="utf-8")
+    st = os.stat(p)
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_yaml_cached(str(p)) == {"a": 22}